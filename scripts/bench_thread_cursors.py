@@ -0,0 +1,88 @@
+"""Compare loading full SlackThread rows against thread cursors for one poll cycle.
+
+Builds a throwaway SQLite database with many tracked threads, each carrying
+a large message_history_json, and times the two ways the poller can list a
+channel's threads:
+
+    python scripts/bench_thread_cursors.py --threads 5000 --history-kb 64
+"""
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from sqlalchemy import create_engine, insert, select
+
+from danny_checksum.connectors.database import engine as engine_module
+from danny_checksum.connectors.database import slack_thread_dao
+from danny_checksum.connectors.database.models import Base, SlackThread
+
+CHANNEL_ID = "CBENCH"
+
+
+def _measure(fn, repeats: int) -> tuple[float, float]:
+    """Return the best wall time in seconds and the peak traced memory in MB."""
+    best = float("inf")
+    peak = 0
+    for _ in range(repeats):
+        tracemalloc.start()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+    return best, peak / 1024 / 1024
+
+
+def _load_full_rows() -> list[SlackThread]:
+    # What get_active_threads did before the cursor query
+    with engine_module.get_session() as session:
+        return list(
+            session.scalars(
+                select(SlackThread).where(
+                    SlackThread.channel_id == CHANNEL_ID, SlackThread.status == "active"
+                )
+            ).all()
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=2000)
+    parser.add_argument("--history-kb", type=int, default=64)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine_module.engine = create_engine(f"sqlite:///{Path(tmp) / 'bench.db'}")
+        Base.metadata.create_all(engine_module.engine)
+
+        history = '[{"parts": "' + "x" * (args.history_kb * 1024) + '"}]'
+        with engine_module.engine.begin() as conn:
+            conn.execute(
+                insert(SlackThread),
+                [
+                    {
+                        "channel_id": CHANNEL_ID,
+                        "thread_ts": f"{1700000000 + i}.000100",
+                        "session_id": i,
+                        "message_history_json": history,
+                        "last_reply_ts": f"{1700000000 + i}.000200",
+                    }
+                    for i in range(args.threads)
+                ],
+            )
+
+        print(f"{args.threads} threads, {args.history_kb}KB of history each")
+        for name, fn in [
+            ("full rows", _load_full_rows),
+            ("cursors", lambda: slack_thread_dao.get_active_thread_cursors(CHANNEL_ID)),
+        ]:
+            seconds, peak_mb = _measure(fn, args.repeats)
+            print(f"  {name:<10} {seconds * 1000:8.1f} ms  {peak_mb:8.1f} MB peak")
+        engine_module.engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
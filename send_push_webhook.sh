@@ -0,0 +1,15 @@
+#!/usr/bin/env bash
+# Send a signed GitHub push event to a local server, e.g. ./send_push_webhook.sh owner/repo
+set -euo pipefail
+
+REPO=$1
+BEFORE=${2:-$(git rev-parse HEAD~1)}
+AFTER=${3:-$(git rev-parse HEAD)}
+PAYLOAD="{\"ref\": \"refs/heads/main\", \"before\": \"$BEFORE\", \"after\": \"$AFTER\", \"repository\": {\"full_name\": \"$REPO\"}}"
+SIGNATURE=$(printf '%s' "$PAYLOAD" | openssl dgst -sha256 -hmac "$GITHUB_WEBHOOK_SECRET" | sed 's/^.* //')
+
+curl -X POST http://localhost:8000/webhooks/github \
+  -H "Content-Type: application/json" \
+  -H "X-GitHub-Event: push" \
+  -H "X-Hub-Signature-256: sha256=$SIGNATURE" \
+  -d "$PAYLOAD"
@@ -143,4 +143,19 @@ def create_agent(client: GitHubClient) -> Agent:
         """
         return client.create_or_update_file(repo, path, content, message, branch)
 
+    @agent.tool_plain
+    def commit_files(
+        repo: str, files: dict[str, str], message: str, branch: str = "main"
+    ) -> str:
+        """Create or update several files in a single commit. Prefer this over
+        create_or_update_file when writing more than one file.
+
+        Args:
+            repo: Repository in 'owner/repo' format.
+            files: Mapping of file path within the repo to file content (text).
+            message: Commit message.
+            branch: Target branch (default: main).
+        """
+        return client.commit_files(repo, branch, files, message)
+
     return agent
@@ -1,35 +1,162 @@
+import asyncio
 import os
 import time
+from pathlib import Path
 
-from crontab import CronTab
 from dotenv import load_dotenv
 
-from danny_checksum.connectors.database.repo_dao import get_last_sha, set_last_sha
-from danny_checksum.connectors.source_control.github_client import GitHubClient
+from danny_checksum.business_logic.classical.backend.pollers.scheduler import (
+    TICK_SECONDS,
+    PollScheduler,
+)
+from danny_checksum.connectors.database import checksum_change_dao, repo_dao
+from danny_checksum.connectors.database.repo_dao import advance_last_sha, get_last_sha
+from danny_checksum.connectors.source_control.async_github_client import AsyncGitHubClient
+from danny_checksum.connectors.source_control.git_mirror import DEFAULT_MIRROR_DIR, GitMirror
 
+DEFAULT_MAX_CONCURRENCY = 8
+CHECKSUM_PATH = ".checksum"
 
-CronTab("*/5 * * * *")
-def poll_main_branch(client: GitHubClient, repo: str) -> None:
-    branch = client.github.get_repo(repo).get_branch("main")
-    current_sha = branch.commit.sha
+# Where change detection reads from: the GitHub API, or local bare mirrors
+GitSource = AsyncGitHubClient | GitMirror
 
-    previous_sha = get_last_sha(repo)
-    if previous_sha is not None and previous_sha != current_sha:
-        old_blob = client.get_file_blob_sha(repo, ".checksum", ref=previous_sha)
-        new_blob = client.get_file_blob_sha(repo, ".checksum", ref=current_sha)
-        if old_blob is not None and new_blob is not None and old_blob != new_blob:
-            print(f".checksum changed! {previous_sha} -> {current_sha}")
-            set_last_sha(repo, current_sha)
 
+def make_git_source(client: AsyncGitHubClient, token: str) -> GitSource:
+    """Return a GitMirror if GIT_POLLER_MODE=mirror, otherwise the API client."""
+    if os.environ.get("GIT_POLLER_MODE", "api") == "mirror":
+        return GitMirror(token, Path(os.environ.get("GIT_MIRROR_DIR", DEFAULT_MIRROR_DIR)))
+    return client
 
-if __name__ == "__main__":
-    load_dotenv()
-    client = GitHubClient.from_token(os.environ["GITHUB_TOKEN"])
-    repo = os.environ["GITHUB_REPO"]
-    print(f"Polling {repo} every 10s...")
-    while True:
+
+# One lock per repo, so the webhook and the periodic poll never process a repo at once
+_repo_locks: dict[str, asyncio.Lock] = {}
+
+
+def _prune_repo_locks(tracked: set[str]) -> None:
+    """Forget the locks of repos that are no longer tracked, unless one is still held."""
+    for repo in _repo_locks.keys() - tracked:
+        if not _repo_locks[repo].locked():
+            del _repo_locks[repo]
+
+
+async def poll_main_branch(
+    client: GitSource, repo: str, current_sha: str | None = None
+) -> None:
+    """Record the commits since the last processed SHA that touched .checksum, then advance it.
+
+    On the first poll of a repo its head only becomes the baseline; a change
+    is a commit between two known SHAs. Polls of the same repo are
+    serialized, and the cursor only ever moves forward.
+    """
+    async with _repo_locks.setdefault(repo, asyncio.Lock()):
+        await _poll_main_branch(client, repo, current_sha)
+
+
+async def _poll_main_branch(client: GitSource, repo: str, current_sha: str | None) -> None:
+    if current_sha is None:
+        current_sha = await client.get_branch_sha(repo, "main")
+
+    # The DAO calls are synchronous, so they run in a thread to keep the event loop free
+    previous_sha = await asyncio.to_thread(get_last_sha, repo)
+    if previous_sha == current_sha:
+        return
+    # A head read before an earlier poll of this repo finished can be older than the cursor
+    if previous_sha is not None and await client.is_behind(repo, previous_sha, current_sha):
+        return
+
+    if previous_sha is None:
+        touched = []
+    else:
+        touched = await client.commits_touching(repo, previous_sha, current_sha, CHECKSUM_PATH)
+
+    for sha in touched:
+        print(f".checksum changed in {repo} at {sha}")
+        await asyncio.to_thread(checksum_change_dao.record_change, repo, sha)
+    # Another process (e.g. a standalone git poller) may have moved the cursor meanwhile
+    if not await asyncio.to_thread(advance_last_sha, repo, previous_sha, current_sha):
+        print(f"Git poller: {repo} was advanced by another poll; leaving its cursor alone")
+
+
+async def _poll_repo(
+    client: GitSource, repo: str, current_sha: str, semaphore: asyncio.Semaphore
+) -> float:
+    """Poll one repo, isolating its errors from the rest of the cycle. Returns elapsed seconds."""
+    async with semaphore:
+        start = time.monotonic()
         try:
-            poll_main_branch(client, repo)
+            await poll_main_branch(client, repo, current_sha)
         except Exception as e:
-            print(f"poll_main_branch error: {e}")
-        time.sleep(10)
+            print(f"poll_main_branch error for {repo}: {e}")
+        return time.monotonic() - start
+
+
+async def poll_all_repos(
+    client: GitSource,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    scheduler: PollScheduler | None = None,
+) -> None:
+    """Poll every customer repo from the database concurrently.
+
+    Branch heads for all repos are fetched up front in batched GraphQL
+    queries, so only repos whose main branch moved cost any further calls.
+    With a scheduler, only repos that are due are checked.
+    """
+    start = time.monotonic()
+    repos = await asyncio.to_thread(repo_dao.list_repos)
+    last_shas = {r.name: r.last_git_sha_successfully_processed for r in repos}
+    _prune_repo_locks(set(last_shas))
+    if scheduler is not None:
+        last_shas = {repo: last_shas[repo] for repo in scheduler.due(last_shas)}
+    if not last_shas:
+        return
+    heads = await client.get_branch_heads(list(last_shas), "main", path=CHECKSUM_PATH)
+    for repo in last_shas.keys() - heads.keys():
+        print(f"Git poller: no main branch found for {repo}")
+    moved = {repo: head.sha for repo, head in heads.items() if head.sha != last_shas[repo]}
+
+    semaphore = asyncio.Semaphore(max_concurrency)
+    elapsed_per_repo = await asyncio.gather(
+        *(_poll_repo(client, repo, sha, semaphore) for repo, sha in moved.items())
+    )
+    durations = dict(zip(moved, elapsed_per_repo))
+
+    if scheduler is not None:
+        for repo in last_shas:
+            scheduler.record(repo, active=repo in moved)
+        remaining, limit = client.rate_limiting
+        scheduler.observe_rate_limit(remaining, limit, client.rate_limiting_resettime)
+
+    elapsed = time.monotonic() - start
+    slowest = max(durations, key=durations.get, default=None)
+    summary = (
+        f"Git poller: checked {len(last_shas)} repo(s), {len(moved)} moved, in {elapsed:.2f}s"
+    )
+    if slowest is not None:
+        summary += f" (slowest: {slowest} {durations[slowest]:.2f}s)"
+    print(summary)
+
+
+async def main() -> None:
+    load_dotenv()
+    max_concurrency = int(os.environ.get("GIT_POLLER_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+    token = os.environ["GITHUB_TOKEN"]
+    client = AsyncGitHubClient.from_token(token, persistent_cache=True)
+    source = make_git_source(client, token)
+    if "GITHUB_REPO" in os.environ:
+        repo_dao.add_repo(os.environ["GITHUB_REPO"])
+    repos = repo_dao.list_repos()
+    print(f"Polling {len(repos)} repo(s): {', '.join(r.name for r in repos)}")
+    scheduler = PollScheduler()
+    try:
+        while True:
+            try:
+                await poll_all_repos(source, max_concurrency, scheduler)
+            except Exception as e:
+                print(f"poll_all_repos error: {e}")
+            await asyncio.sleep(TICK_SECONDS)
+    finally:
+        await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,58 @@
+import time
+from dataclasses import dataclass, field
+from typing import Iterable
+
+# How often the poll loops wake up to check which targets are due
+TICK_SECONDS = 10
+
+
+@dataclass
+class PollScheduler:
+    """Adaptive per-target poll intervals, paced by the upstream rate limit.
+
+    A target (repo name, channel ID) that showed activity on its last poll is
+    polled again after min_interval; each idle poll multiplies its interval by
+    backoff, up to max_interval. When the API asks us to slow down, the whole
+    fleet is paused until the limit resets.
+    """
+
+    min_interval: float = 30.0
+    max_interval: float = 1800.0
+    backoff: float = 2.0
+    # Pause once fewer than this fraction of the rate limit remains
+    reserve_fraction: float = 0.1
+    _intervals: dict[str, float] = field(default_factory=dict, repr=False)
+    _next_due: dict[str, float] = field(default_factory=dict, repr=False)
+    _paused_until: float = field(default=0.0, repr=False)
+
+    def due(self, targets: Iterable[str], now: float | None = None) -> list[str]:
+        """Return the targets whose next poll time has passed. New targets are always due."""
+        now = time.time() if now is None else now
+        if now < self._paused_until:
+            return []
+        return [t for t in targets if self._next_due.get(t, 0.0) <= now]
+
+    def record(self, target: str, active: bool, now: float | None = None) -> None:
+        """Schedule a target's next poll from whether its last poll found anything new."""
+        now = time.time() if now is None else now
+        if active:
+            interval = self.min_interval
+        else:
+            previous = self._intervals.get(target, self.min_interval)
+            interval = min(self.max_interval, previous * self.backoff)
+        self._intervals[target] = interval
+        self._next_due[target] = now + interval
+
+    def pause_until(self, until: float) -> None:
+        """Stop every target from being due until the given epoch time."""
+        if until > self._paused_until:
+            print(f"Poll scheduler: pausing for {until - time.time():.0f}s")
+            self._paused_until = until
+
+    def pause_for(self, seconds: float) -> None:
+        self.pause_until(time.time() + seconds)
+
+    def observe_rate_limit(self, remaining: int, limit: int, reset_at: float) -> None:
+        """Pause until reset_at if the remaining quota has dropped into the reserve."""
+        if limit > 0 and remaining <= limit * self.reserve_fraction:
+            self.pause_until(reset_at)
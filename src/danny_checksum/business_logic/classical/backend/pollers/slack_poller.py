@@ -1,142 +1,441 @@
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from dotenv import load_dotenv
-from pydantic import TypeAdapter
-from pydantic_ai.messages import ModelMessage
-
-from danny_checksum.business_logic.agentic.onboarding_agent import create_agent
+from slack_sdk.errors import SlackApiError
+from sqlalchemy.orm import Session
+
+from danny_checksum.business_logic.classical.backend.pollers.scheduler import (
+    TICK_SECONDS,
+    PollScheduler,
+)
+from danny_checksum.connectors.chat_programs.rate_limiter import retry_after_seconds
 from danny_checksum.connectors.chat_programs.slack_client import SlackClient
-from danny_checksum.connectors.database import customer_channel_dao, onboarding_dao, slack_thread_dao
+from danny_checksum.connectors.database import agent_job_dao, customer_channel_dao, slack_thread_dao
+from danny_checksum.connectors.database.engine import get_session
+from danny_checksum.connectors.database.models import CustomerSlackChannel
 from danny_checksum.connectors.database.slack_dao import get_last_thread_ts, set_last_thread_ts
-
-_message_list_adapter = TypeAdapter(list[ModelMessage])
-
-
-def poll_slack_channel(
-    client: SlackClient, channel_id: str, bot_user_id: str, channel_name: str | None = None
+from danny_checksum.connectors.database.slack_thread_dao import ThreadCursor
+
+# How many channels to poll at once
+DEFAULT_MAX_CONCURRENCY = 8
+
+# New messages are fetched in pages of HISTORY_PAGE_SIZE, at most
+# MAX_HISTORY_PAGES per channel per cycle; a bigger backlog resumes next cycle
+HISTORY_PAGE_SIZE = 200
+MAX_HISTORY_PAGES = 5
+
+# With no high-water mark yet, only look at this many of the latest messages
+FIRST_POLL_LIMIT = 5
+
+# channel_id -> (cursor, newest ts of the backlog) for channels part way through a backlog
+_history_cursors: dict[str, tuple[str, str]] = {}
+
+# Thread tiers as (max seconds since last activity, seconds between polls):
+# hot threads are checked every channel poll, warm and cold ones less often
+THREAD_TIERS = [
+    (60 * 60, 0),
+    (24 * 60 * 60, 5 * 60),
+    (7 * 24 * 60 * 60, 60 * 60),
+]
+# Threads quiet for longer than the last tier are archived until a new reply revives them.
+# With no Events API to report that reply, each channel's archived threads are checked
+# this often, from the latest_reply of their parent messages in the channel history.
+ARCHIVE_CHECK_INTERVAL = 60 * 60
+
+# channel_id -> when its archived threads were last checked for new replies
+_archive_checked_at: dict[str, float] = {}
+
+# How long to wait after a thread reply for the user to finish typing before answering
+DEFAULT_REPLY_DEBOUNCE_SECONDS = 5.0
+
+
+def reply_debounce_seconds() -> float | None:
+    """Return the debounce window for coalescing thread replies, or None if coalescing is off.
+
+    Set SLACK_COALESCE_REPLIES=0 to answer each reply separately, and
+    SLACK_REPLY_DEBOUNCE_SECONDS to change the window.
+    """
+    if os.environ.get("SLACK_COALESCE_REPLIES", "1") == "0":
+        return None
+    return float(os.environ.get("SLACK_REPLY_DEBOUNCE_SECONDS", DEFAULT_REPLY_DEBOUNCE_SECONDS))
+
+
+def handle_new_message(
+    channel_id: str,
+    msg: dict,
+    bot_user_id: str,
+    channel_name: str | None = None,
+    session: Session | None = None,
+    seen_ts: set[str] | None = None,
+) -> bool:
+    """Queue an agent job for a new top-level message. Returns True if one was queued.
+
+    seen_ts, if given, is the set of message ts values that already have a
+    thread, looked up up front for a whole batch of messages.
+    """
+    ts = msg["ts"]
+
+    # Skip bot's own messages
+    if msg.get("user") == bot_user_id:
+        return False
+
+    # Skip join notifications
+    if "has joined the channel" in msg.get("text", ""):
+        return False
+
+    # Skip threaded replies (they have a thread_ts different from their ts)
+    if msg.get("thread_ts") and msg["thread_ts"] != ts:
+        return False
+
+    # Skip if we already created a thread for this message (crash recovery)
+    if seen_ts is not None:
+        if ts in seen_ts:
+            return False
+    elif slack_thread_dao.get_thread_by_ts(ts, session) is not None:
+        return False
+
+    text = msg.get("text", "")
+    print(f"Slack poller: new message in {channel_id}: {text[:80]}")
+
+    return agent_job_dao.enqueue(
+        "new_message",
+        idempotency_key=f"new_message:{channel_id}:{ts}",
+        group_key=ts,
+        payload={"channel_id": channel_id, "ts": ts, "text": text, "channel_name": channel_name},
+        session=session,
+    )
+
+
+def read_new_user_replies(
+    client: SlackClient, channel_id: str, thread: ThreadCursor, bot_user_id: str
+) -> list[dict]:
+    """Fetch the user replies in a tracked thread since its last reply."""
+    replies = client.read_thread_replies(
+        channel_id, thread.thread_ts, oldest=thread.last_reply_ts
+    )
+
+    # Filter out bot messages and already-seen messages
+    return [
+        r for r in replies
+        if r.get("user") != bot_user_id
+        and (thread.last_reply_ts is None or r["ts"] > thread.last_reply_ts)
+    ]
+
+
+def queue_thread_replies(
+    channel_id: str,
+    thread: ThreadCursor,
+    replies: list[dict],
+    channel_name: str | None = None,
+    session: Session | None = None,
 ) -> None:
-    client.join_channel(channel_id)
-
-    # --- Part 1: new top-level messages ---
-    result = client.client.conversations_history(channel=channel_id, limit=5)
-    messages = result.get("messages", [])
-    if not messages:
-        return
-
-    previous_ts = get_last_thread_ts(channel_id)
-
-    for msg in reversed(messages):
-        ts = msg["ts"]
-
-        # Only look at messages newer than what we've already processed
-        if previous_ts is not None and ts <= previous_ts:
-            continue
-
-        # Skip bot's own messages
-        if msg.get("user") == bot_user_id:
-            continue
-
-        # Skip join notifications
-        if "has joined the channel" in msg.get("text", ""):
-            continue
-
-        # Skip threaded replies (they have a thread_ts different from their ts)
-        if msg.get("thread_ts") and msg["thread_ts"] != ts:
-            continue
+    """Queue an agent job to answer new user replies in a thread."""
+    for reply in replies:
+        print(f"Slack poller: thread reply in {thread.thread_ts}: {reply.get('text', '')[:80]}")
+
+    debounce = reply_debounce_seconds()
+    # Keyed on the newest reply, so polling again before the job runs doesn't queue a duplicate
+    idempotency_key = f"thread_replies:{thread.thread_ts}:{replies[-1]['ts']}"
+    queued = agent_job_dao.enqueue(
+        "thread_replies",
+        idempotency_key=idempotency_key,
+        group_key=thread.thread_ts,
+        payload={
+            "channel_id": channel_id,
+            "thread_ts": thread.thread_ts,
+            "channel_name": channel_name,
+            "replies": [{"ts": r["ts"], "text": r.get("text", "")} for r in replies],
+            "coalesce": debounce is not None,
+        },
+        delay=debounce or 0.0,
+        session=session,
+    )
+    if queued and debounce is not None:
+        # The new job carries every reply since the last answer, so it replaces any still
+        # waiting out their debounce; each reply in a burst restarts the window
+        agent_job_dao.supersede_pending(
+            "thread_replies", thread.thread_ts, idempotency_key, session=session
+        )
 
-        # Skip if we already created a thread for this message (crash recovery)
-        if slack_thread_dao.get_thread_by_ts(ts) is not None:
-            continue
 
-        text = msg.get("text", "")
-        print(f"Slack poller: new message in {channel_id}: {text[:80]}")
+def handle_thread_replies(
+    client: SlackClient,
+    channel_id: str,
+    thread: ThreadCursor,
+    bot_user_id: str,
+    channel_name: str | None = None,
+) -> bool:
+    """Queue an agent job for user replies in a tracked thread since its last reply.
 
-        # Create onboarding session + slack thread
-        session_id = onboarding_dao.create_session(phase="sales")
-        slack_thread_dao.create_thread(channel_id, ts, session_id)
+    Returns True if there were any.
+    """
+    replies = read_new_user_replies(client, channel_id, thread, bot_user_id)
+    if not replies:
+        return False
+    queue_thread_replies(channel_id, thread, replies, channel_name)
+    return True
 
-        # Run the onboarding agent
-        agent = create_agent(role="sales", session_id=session_id, channel_name=channel_name)
-        agent_result = agent.run_sync(text)
 
-        # Post the reply in a thread
-        reply_data = client.post_message(channel_id, agent_result.output, thread_ts=ts)
-        reply_ts = reply_data.get("ts", ts)
+def thread_poll_interval(last_activity: float, now: float) -> float | None:
+    """Return how long to wait before polling a thread again, or None to archive it."""
+    for max_age, interval in THREAD_TIERS:
+        if now - last_activity <= max_age:
+            return interval
+    return None
 
-        # Persist message history
-        history_json = _message_list_adapter.dump_json(agent_result.all_messages()).decode()
-        slack_thread_dao.update_message_history(ts, history_json, reply_ts)
 
-    # Update the high-water mark to the latest message ts
-    set_last_thread_ts(channel_id, messages[0]["ts"])
+def _reschedule_thread(
+    thread: ThreadCursor, replied: bool, now: float, session: Session | None = None
+) -> None:
+    last_activity = now if replied else float(thread.last_reply_ts or thread.thread_ts)
+    interval = thread_poll_interval(last_activity, now)
+    if interval is None:
+        print(f"Slack poller: archiving quiet thread {thread.thread_ts}")
+        slack_thread_dao.archive_thread(thread.thread_ts, session)
+    elif interval > 0:
+        slack_thread_dao.schedule_thread(thread.thread_ts, now + interval, session)
+    elif thread.next_poll_at is not None or thread.status == "archived":
+        # Hot again; due every poll
+        slack_thread_dao.revive_thread(thread.thread_ts, session)
+
+
+def fetch_new_messages(
+    client: SlackClient, channel_id: str, previous_ts: str | None
+) -> tuple[list[dict], str | None, str | None]:
+    """Fetch messages newer than the channel's high-water mark, paging until caught up.
+
+    Returns the messages oldest first, the cursor to resume from next cycle
+    if the backlog was bigger than MAX_HISTORY_PAGES (else None), and the
+    newest ts in the backlog.
+    """
+    if previous_ts is None:
+        messages, _ = client.read_history_page(channel_id, limit=FIRST_POLL_LIMIT)
+        newest_ts = messages[0]["ts"] if messages else None
+        return list(reversed(messages)), None, newest_ts
+
+    cursor, newest_ts = _history_cursors.pop(channel_id, (None, None))
+    messages = []
+    for _ in range(MAX_HISTORY_PAGES):
+        page, cursor = client.read_history_page(
+            channel_id, oldest=previous_ts, cursor=cursor, limit=HISTORY_PAGE_SIZE
+        )
+        if newest_ts is None and page:
+            newest_ts = page[0]["ts"]
+        messages.extend(page)
+        if cursor is None:
+            break
+    return list(reversed(messages)), cursor, newest_ts
+
+
+def find_revived_threads(
+    client: SlackClient, channel_id: str, archived: list[ThreadCursor]
+) -> list[ThreadCursor]:
+    """Return the archived threads with replies since their last bot reply.
+
+    Reads the stretch of channel history spanning the archived threads'
+    parent messages and compares each parent's latest_reply. Nearly every
+    top-level message becomes a thread, so that's about one page per
+    HISTORY_PAGE_SIZE archived threads.
+    """
+    if not archived:
+        return []
+    by_ts = {thread.thread_ts: thread for thread in archived}
+    revived = []
+    cursor = None
+    while True:
+        page, cursor = client.read_history_page(
+            channel_id,
+            oldest=min(by_ts),
+            latest=max(by_ts),
+            inclusive=True,
+            cursor=cursor,
+            limit=HISTORY_PAGE_SIZE,
+        )
+        for msg in page:
+            thread = by_ts.get(msg["ts"])
+            if thread is not None and msg.get("latest_reply", "") > (thread.last_reply_ts or thread.thread_ts):
+                revived.append(thread)
+        if cursor is None:
+            return revived
 
-    # --- Part 2: existing thread replies ---
-    tracked_threads = slack_thread_dao.get_active_threads(channel_id)
 
-    for thread in tracked_threads:
-        replies = client.read_thread_replies(
-            channel_id, thread.thread_ts, oldest=thread.last_reply_ts
+def poll_slack_channel(
+    client: SlackClient, channel_id: str, bot_user_id: str, channel_name: str | None = None
+) -> bool:
+    """Process new messages and thread replies in a channel. Returns True if there were any.
+
+    The channel's cursors are loaded, then all of Slack is read with no
+    database session open, then every job, the high-water mark and the
+    thread schedules are written in one transaction. A crash part way
+    through leaves nothing half-recorded, and no pooled connection or write
+    lock is held while waiting on Slack.
+    """
+    client.ensure_joined(channel_id)
+
+    # --- Read: the channel's cursors ---
+    now = time.time()
+    check_archive = now - _archive_checked_at.get(channel_id, 0.0) >= ARCHIVE_CHECK_INTERVAL
+    with get_session() as session:
+        previous_ts = get_last_thread_ts(channel_id, session)
+        # Cursors only; a thread's history is loaded by the agent worker if it has new replies
+        tracked_threads = slack_thread_dao.get_active_thread_cursors(channel_id, now, session)
+        archived = (
+            slack_thread_dao.get_archived_thread_cursors(channel_id, session) if check_archive else []
         )
 
-        # Filter out bot messages and already-seen messages
-        new_user_replies = [
-            r for r in replies
-            if r.get("user") != bot_user_id
-            and (thread.last_reply_ts is None or r["ts"] > thread.last_reply_ts)
-        ]
-
-        if not new_user_replies:
-            continue
-
-        # Load existing message history
-        if thread.message_history_json:
-            history = _message_list_adapter.validate_json(thread.message_history_json)
-        else:
-            history = []
-
-        # Recreate agent for this session
-        agent = create_agent(role="sales", session_id=thread.session_id, channel_name=channel_name)
-
-        # Process each new reply
-        latest_reply_ts = thread.last_reply_ts
-        for reply in new_user_replies:
-            text = reply.get("text", "")
-            print(f"Slack poller: thread reply in {thread.thread_ts}: {text[:80]}")
-
-            agent_result = agent.run_sync(text, message_history=history)
-            history = agent_result.all_messages()
-
-            reply_data = client.post_message(
-                channel_id, agent_result.output, thread_ts=thread.thread_ts
-            )
-            latest_reply_ts = reply_data.get("ts", reply["ts"])
-
-        # Persist updated history
-        history_json = _message_list_adapter.dump_json(history).decode()
-        slack_thread_dao.update_message_history(
-            thread.thread_ts, history_json, latest_reply_ts
-        )
+    # --- Read: new top-level messages, and replies in threads whose tier makes them due ---
+    messages, cursor, newest_ts = fetch_new_messages(client, channel_id, previous_ts)
+    for thread in find_revived_threads(client, channel_id, archived):
+        print(f"Slack poller: reviving archived thread {thread.thread_ts}")
+        tracked_threads.append(thread)
+    replies = {
+        thread.thread_ts: read_new_user_replies(client, channel_id, thread, bot_user_id)
+        for thread in tracked_threads
+    }
+
+    # --- Write ---
+    active = False
+    with get_session() as session:
+        seen_ts = slack_thread_dao.get_existing_thread_ts([m["ts"] for m in messages], session)
+        for msg in messages:
+            if handle_new_message(channel_id, msg, bot_user_id, channel_name, session, seen_ts):
+                active = True
+
+        if cursor is None and newest_ts is not None:
+            # Update the high-water mark to the latest message ts
+            set_last_thread_ts(channel_id, newest_ts, session)
+
+        for thread in tracked_threads:
+            thread_replies = replies[thread.thread_ts]
+            if thread_replies:
+                queue_thread_replies(channel_id, thread, thread_replies, channel_name, session)
+                active = True
+            _reschedule_thread(thread, bool(thread_replies), now, session)
+
+        session.commit()
+
+    if check_archive:
+        _archive_checked_at[channel_id] = now
+    if cursor is not None:
+        # Part way through a backlog; the mark only moves once it's all been seen
+        print(f"Slack poller: backlog in {channel_id}, resuming next cycle")
+        _history_cursors[channel_id] = (cursor, newest_ts)
+        active = True
+
+    return active
+
+
+def handle_message_event(client: SlackClient, event: dict, bot_user_id: str) -> None:
+    """Handle a `message` event from the Slack Events API in a customer channel.
+
+    Reuses the poller's handlers, so anything the events path misses is
+    picked up by the next poll. The high-water mark is left to the poller,
+    so a dropped event can never be skipped over.
+    """
+    # Edits, deletions, joins and bot posts all carry a subtype
+    if event.get("subtype") is not None or event.get("user") == bot_user_id:
+        return
 
+    channel = customer_channel_dao.get_channel(event["channel"])
+    if channel is None:
+        return
 
-def poll_all_slack_channels(client: SlackClient, bot_user_id: str) -> None:
-    """Poll all monitored channels from the database."""
+    thread_ts = event.get("thread_ts")
+    if thread_ts and thread_ts != event["ts"]:
+        thread = slack_thread_dao.get_thread_cursor(thread_ts)
+        if thread is not None:
+            # Any reply makes the thread hot again, archived or not
+            if thread.next_poll_at is not None or thread.status == "archived":
+                slack_thread_dao.revive_thread(thread_ts)
+            handle_thread_replies(client, channel.channel_id, thread, bot_user_id, channel.name)
+    else:
+        handle_new_message(channel.channel_id, event, bot_user_id, channel.name)
+
+
+def _poll_channel(
+    client: SlackClient, channel: CustomerSlackChannel, bot_user_id: str
+) -> tuple[bool, float]:
+    """Poll one channel, returning whether it was active and how long it took."""
+    start = time.monotonic()
+    active = poll_slack_channel(client, channel.channel_id, bot_user_id, channel.name)
+    return active, time.monotonic() - start
+
+
+def poll_all_slack_channels(
+    client: SlackClient,
+    bot_user_id: str,
+    scheduler: PollScheduler | None = None,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+) -> None:
+    """Poll all monitored channels from the database concurrently.
+
+    An error in one channel doesn't stop the others. With a scheduler, only
+    channels that are due are polled, and a 429 from Slack pauses every
+    channel for the Retry-After period.
+    """
+    start = time.monotonic()
     channels = customer_channel_dao.list_channels()
-    for ch in channels:
-        poll_slack_channel(client, ch.channel_id, bot_user_id, ch.name)
+    if scheduler is not None:
+        due = set(scheduler.due(ch.channel_id for ch in channels))
+        channels = [ch for ch in channels if ch.channel_id in due]
+    if not channels:
+        return
+
+    # Keyed by channel_id; names aren't unique
+    durations = {}
+    active_count = 0
+    with ThreadPoolExecutor(max_workers=max_concurrency) as pool:
+        futures = {pool.submit(_poll_channel, client, ch, bot_user_id): ch for ch in channels}
+        for future in as_completed(futures):
+            ch = futures[future]
+            if future.cancelled():
+                continue
+            try:
+                active, durations[ch.channel_id] = future.result()
+            except SlackApiError as e:
+                if scheduler is not None and e.response.status_code == 429:
+                    scheduler.pause_for(retry_after_seconds(e.response.headers))
+                    # Don't start any more channels; the scheduler is paused anyway
+                    for pending in futures:
+                        pending.cancel()
+                    continue
+                print(f"Slack poller: error polling #{ch.name}: {e}")
+                active = False
+            except Exception as e:
+                print(f"Slack poller: error polling #{ch.name}: {e}")
+                active = False
+            active_count += active
+            if scheduler is not None:
+                scheduler.record(ch.channel_id, active)
+
+    elapsed = time.monotonic() - start
+    slowest = max(durations, key=durations.get, default=None)
+    summary = (
+        f"Slack poller: checked {len(durations)}/{len(channels)} channel(s), "
+        f"{active_count} active, in {elapsed:.2f}s"
+    )
+    if slowest is not None:
+        name = next(ch.name for ch in channels if ch.channel_id == slowest)
+        summary += f" (slowest: #{name} {durations[slowest]:.2f}s)"
+    print(summary)
 
 
 if __name__ == "__main__":
     load_dotenv()
-    client = SlackClient.from_token(os.environ["SLACK_AUTH_TOKEN"])
+    # 429s come back to poll_all_slack_channels, which pauses every channel for Retry-After,
+    # rather than being retried inside the pool's worker threads
+    client = SlackClient.from_token(os.environ["SLACK_AUTH_TOKEN"], retry_rate_limits=False)
     bot_user_id = client.get_bot_user_id()
     print(f"Bot user ID: {bot_user_id}")
     channels = customer_channel_dao.list_channels()
     print(f"Monitoring {len(channels)} channel(s): {', '.join(f'#{c.name}' for c in channels)}")
-    print("Polling every 10s...")
+    max_concurrency = int(os.environ.get("SLACK_POLLER_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+    scheduler = PollScheduler()
     while True:
         try:
-            poll_all_slack_channels(client, bot_user_id)
+            poll_all_slack_channels(client, bot_user_id, scheduler, max_concurrency)
         except Exception as e:
             print(f"poll_all_slack_channels error: {e}")
-        time.sleep(10)
+        time.sleep(TICK_SECONDS)
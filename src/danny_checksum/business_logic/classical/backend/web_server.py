@@ -1,53 +1,144 @@
 import asyncio
+import hashlib
+import hmac
+import json
 import os
 from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, Query
+from fastapi import BackgroundTasks, FastAPI, Header, HTTPException, Query, Request
 from pydantic import BaseModel
-
-from danny_checksum.business_logic.classical.backend.pollers.git_poller import poll_main_branch
-from danny_checksum.business_logic.classical.backend.pollers.slack_poller import poll_all_slack_channels
+from slack_sdk.signature import SignatureVerifier
+
+from danny_checksum.business_logic.classical.backend.pollers.git_poller import (
+    DEFAULT_MAX_CONCURRENCY,
+    GitSource,
+    make_git_source,
+    poll_all_repos,
+    poll_main_branch,
+)
+from danny_checksum.business_logic.classical.backend.pollers.scheduler import (
+    TICK_SECONDS,
+    PollScheduler,
+)
+from danny_checksum.business_logic.classical.backend.pollers.slack_poller import (
+    DEFAULT_MAX_CONCURRENCY as SLACK_MAX_CONCURRENCY,
+    handle_message_event,
+    poll_all_slack_channels,
+)
+from danny_checksum.business_logic.classical.backend.workers.agent_worker import (
+    DEFAULT_WORKERS,
+    IDLE_SECONDS,
+    process_next_job,
+    worker_id,
+)
 from danny_checksum.connectors.chat_programs.slack_client import SlackClient
-from danny_checksum.connectors.database import deployment_dao
-from danny_checksum.connectors.source_control.github_client import GitHubClient
+from danny_checksum.connectors.database import checksum_change_dao, deployment_dao, repo_dao
+from danny_checksum.connectors.source_control.async_github_client import AsyncGitHubClient
+
+# With the Events API delivering messages, polling Slack is only a catch-up path
+SLACK_CATCH_UP_INTERVAL = 600
 
-client: GitHubClient
+client: AsyncGitHubClient
+git_source: GitSource
+slack_client: SlackClient
+bot_user_id: str
+slack_events: asyncio.Queue[dict]
+# None when GITHUB_WEBHOOK_SECRET is unset; the push webhook is then disabled
+github_webhook_secret: bytes | None = None
+# None when SLACK_SIGNING_SECRET is unset; the Events API endpoint is then disabled
+slack_signature_verifier: SignatureVerifier | None = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global client
+    global client, git_source, slack_client, bot_user_id, slack_events
+    global github_webhook_secret, slack_signature_verifier
     load_dotenv()
     token = os.environ["GITHUB_TOKEN"]
-    repo = os.environ["GITHUB_REPO"]
-    client = GitHubClient.from_token(token)
+    max_concurrency = int(os.environ.get("GIT_POLLER_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+    client = AsyncGitHubClient.from_token(token, persistent_cache=True)
+    git_source = make_git_source(client, token)
+    if "GITHUB_REPO" in os.environ:
+        repo_dao.add_repo(os.environ["GITHUB_REPO"])
+    if "GITHUB_WEBHOOK_SECRET" in os.environ:
+        github_webhook_secret = os.environ["GITHUB_WEBHOOK_SECRET"].encode()
+    else:
+        print("GITHUB_WEBHOOK_SECRET not set; GitHub push webhook disabled, polling only")
+        github_webhook_secret = None
 
     slack_token = os.environ["SLACK_AUTH_TOKEN"]
     slack_client = SlackClient.from_token(slack_token)
+    slack_max_concurrency = int(
+        os.environ.get("SLACK_POLLER_MAX_CONCURRENCY", SLACK_MAX_CONCURRENCY)
+    )
     bot_user_id = slack_client.get_bot_user_id()
 
+    slack_events = asyncio.Queue()
+
+    git_scheduler = PollScheduler()
+    if "SLACK_SIGNING_SECRET" in os.environ:
+        slack_signature_verifier = SignatureVerifier(os.environ["SLACK_SIGNING_SECRET"])
+        slack_scheduler = PollScheduler(min_interval=SLACK_CATCH_UP_INTERVAL)
+    else:
+        print("SLACK_SIGNING_SECRET not set; Slack events disabled, polling only")
+        slack_signature_verifier = None
+        slack_scheduler = PollScheduler()
+
     async def _poll_git():
         while True:
             try:
-                poll_main_branch(client, repo)
+                await poll_all_repos(git_source, max_concurrency, git_scheduler)
             except Exception as e:
-                print(f"poll_main_branch error: {e}")
-            await asyncio.sleep(300)
+                print(f"poll_all_repos error: {e}")
+            await asyncio.sleep(TICK_SECONDS)
 
     async def _poll_slack():
         while True:
             try:
-                poll_all_slack_channels(slack_client, bot_user_id)
+                await asyncio.to_thread(
+                    poll_all_slack_channels,
+                    slack_client,
+                    bot_user_id,
+                    slack_scheduler,
+                    slack_max_concurrency,
+                )
             except Exception as e:
                 print(f"poll_all_slack_channels error: {e}")
-            await asyncio.sleep(300)
+            await asyncio.sleep(TICK_SECONDS)
+
+    async def _process_slack_events():
+        while True:
+            event = await slack_events.get()
+            try:
+                await asyncio.to_thread(handle_message_event, slack_client, event, bot_user_id)
+            except Exception as e:
+                print(f"handle_message_event error: {e}")
+
+    # The pollers and the events path only queue agent jobs; these run them
+    async def _run_agent_worker(worker: str):
+        while True:
+            try:
+                if await asyncio.to_thread(process_next_job, slack_client, worker):
+                    continue
+            except Exception as e:
+                print(f"process_next_job error: {e}")
+            await asyncio.sleep(IDLE_SECONDS)
 
     git_task = asyncio.create_task(_poll_git())
     slack_task = asyncio.create_task(_poll_slack())
+    slack_events_task = asyncio.create_task(_process_slack_events())
+    workers = int(os.environ.get("AGENT_WORKERS", DEFAULT_WORKERS))
+    worker_tasks = [
+        asyncio.create_task(_run_agent_worker(worker_id(i))) for i in range(workers)
+    ]
     yield
     git_task.cancel()
     slack_task.cancel()
+    slack_events_task.cancel()
+    for task in worker_tasks:
+        task.cancel()
+    await client.aclose()
 
 
 app = FastAPI(title="Danny Checksum GitHub API", lifespan=lifespan)
@@ -90,11 +181,129 @@ class CreateOrUpdateFileRequest(BaseModel):
     branch: str = "main"
 
 
+class CommitFilesRequest(BaseModel):
+    repo: str
+    files: dict[str, str]
+    message: str
+    branch: str = "main"
+
+
 class DeploymentRequest(BaseModel):
     component: str
     sha: str
 
 
+# --- GitHub Cache ---
+
+
+@app.get("/github/cache")
+def github_cache_stats():
+    return {"result": client.cache_stats()}
+
+
+# --- Slack Throttling ---
+
+
+@app.get("/slack/throttling")
+def slack_throttle_stats():
+    return {"result": slack_client.throttle_stats()}
+
+
+# --- Webhooks ---
+
+
+def _verify_github_signature(body: bytes, signature: str | None) -> None:
+    """Raise 401 unless signature is the HMAC-SHA256 of body under GITHUB_WEBHOOK_SECRET."""
+    if github_webhook_secret is None:
+        raise HTTPException(status_code=404, detail="GitHub webhook is not enabled")
+    expected = "sha256=" + hmac.new(github_webhook_secret, body, hashlib.sha256).hexdigest()
+    if signature is None or not hmac.compare_digest(expected, signature):
+        raise HTTPException(status_code=401, detail="Invalid signature")
+
+
+async def _process_push(repo: str, after: str) -> None:
+    try:
+        await poll_main_branch(git_source, repo, after)
+    except Exception as e:
+        print(f"GitHub webhook: error processing push to {repo}: {e}")
+
+
+@app.post("/webhooks/github")
+async def github_webhook(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    x_github_event: str = Header(),
+    x_hub_signature_256: str | None = Header(None),
+):
+    """Handle push events to main for tracked repos straight away.
+
+    The git poller still runs as a slow safety net for missed deliveries.
+    """
+    body = await request.body()
+    _verify_github_signature(body, x_hub_signature_256)
+    if x_github_event != "push":
+        return {"result": "ignored"}
+
+    payload = await request.json()
+    repo = payload["repository"]["full_name"]
+    after = payload["after"]
+    if payload["ref"] != "refs/heads/main" or payload.get("deleted"):
+        return {"result": "ignored"}
+
+    customer_repo = await asyncio.to_thread(repo_dao.get_repo, repo)
+    if customer_repo is None:
+        return {"result": "untracked"}
+    if customer_repo.last_git_sha_successfully_processed == after:
+        return {"result": "duplicate"}
+
+    background_tasks.add_task(_process_push, repo, after)
+    return {"result": "accepted"}
+
+
+@app.post("/webhooks/slack")
+async def slack_webhook(request: Request):
+    """Receive Slack Events API callbacks.
+
+    Acks straight away and queues message events, well inside Slack's
+    3-second window; the Slack poller remains as a low-frequency catch-up.
+    """
+    if slack_signature_verifier is None:
+        raise HTTPException(status_code=404, detail="Slack events are not enabled")
+    body = await request.body()
+    if not slack_signature_verifier.is_valid_request(body, dict(request.headers)):
+        raise HTTPException(status_code=401, detail="Invalid signature")
+
+    payload = json.loads(body)
+    if payload["type"] == "url_verification":
+        return {"challenge": payload["challenge"]}
+    if payload["type"] != "event_callback":
+        return {"result": "ignored"}
+
+    event = payload["event"]
+    if event["type"] == "message":
+        slack_events.put_nowait(event)
+    elif event["type"] == "channel_left":
+        slack_client.set_membership(event["channel"], False)
+    elif event["type"] in ("member_joined_channel", "member_left_channel"):
+        if event.get("user") == bot_user_id:
+            slack_client.set_membership(event["channel"], event["type"] == "member_joined_channel")
+    return {"result": "ok"}
+
+
+# --- .checksum Changes ---
+
+
+@app.get("/checksum/changes")
+def list_checksum_changes(repo: str):
+    """Return the commits on main that changed a repo's .checksum, oldest first."""
+    changes = checksum_change_dao.list_changes(repo)
+    return {
+        "result": [
+            {"commit_sha": c.commit_sha, "recorded_at": c.created_at.isoformat()} for c in changes
+        ]
+    }
+
+
 # --- Deployments ---
 
 
@@ -108,61 +317,66 @@ def create_deployment(req: DeploymentRequest):
 
 
 @app.get("/issues")
-def list_issues(repo: str, state: str = Query("open")):
-    return {"result": client.list_issues(repo, state)}
+async def list_issues(repo: str, state: str = Query("open")):
+    return {"result": await client.list_issues(repo, state)}
 
 
 @app.get("/issues/{issue_number}")
-def get_issue(issue_number: int, repo: str):
-    return {"result": client.get_issue(repo, issue_number)}
+async def get_issue(issue_number: int, repo: str):
+    return {"result": await client.get_issue(repo, issue_number)}
 
 
 @app.post("/issues")
-def create_issue(req: CreateIssueRequest):
-    return {"result": client.create_issue(req.repo, req.title, req.body)}
+async def create_issue(req: CreateIssueRequest):
+    return {"result": await client.create_issue(req.repo, req.title, req.body)}
 
 
 @app.post("/issues/{issue_number}/comments")
-def comment_on_issue(issue_number: int, req: CommentOnIssueRequest):
-    return {"result": client.comment_on_issue(req.repo, issue_number, req.body)}
+async def comment_on_issue(issue_number: int, req: CommentOnIssueRequest):
+    return {"result": await client.comment_on_issue(req.repo, issue_number, req.body)}
 
 
 # --- Pull Requests ---
 
 
 @app.get("/pulls")
-def list_pull_requests(repo: str, state: str = Query("open")):
-    return {"result": client.list_pull_requests(repo, state)}
+async def list_pull_requests(repo: str, state: str = Query("open")):
+    return {"result": await client.list_pull_requests(repo, state)}
 
 
 @app.get("/pulls/{pr_number}")
-def get_pull_request(pr_number: int, repo: str):
-    return {"result": client.get_pull_request(repo, pr_number)}
+async def get_pull_request(pr_number: int, repo: str):
+    return {"result": await client.get_pull_request(repo, pr_number)}
 
 
 @app.post("/pulls")
-def create_pull_request(req: CreatePullRequestRequest):
-    return {"result": client.create_pull_request(req.repo, req.title, req.body, req.head, req.base)}
+async def create_pull_request(req: CreatePullRequestRequest):
+    return {"result": await client.create_pull_request(req.repo, req.title, req.body, req.head, req.base)}
 
 
 @app.post("/pulls/{pr_number}/comments")
-def comment_on_pr(pr_number: int, req: CommentOnPrRequest):
-    return {"result": client.comment_on_pr(req.repo, pr_number, req.body)}
+async def comment_on_pr(pr_number: int, req: CommentOnPrRequest):
+    return {"result": await client.comment_on_pr(req.repo, pr_number, req.body)}
 
 
 # --- Repo Content ---
 
 
 @app.get("/repos/file")
-def get_file_content(repo: str, path: str, ref: str = Query("main")):
-    return {"result": client.get_file_content(repo, path, ref)}
+async def get_file_content(repo: str, path: str, ref: str = Query("main")):
+    return {"result": await client.get_file_content(repo, path, ref)}
 
 
 @app.get("/repos/directory")
-def list_directory(repo: str, path: str = Query("")):
-    return {"result": client.list_directory(repo, path)}
+async def list_directory(repo: str, path: str = Query("")):
+    return {"result": await client.list_directory(repo, path)}
 
 
 @app.post("/repos/file")
-def create_or_update_file(req: CreateOrUpdateFileRequest):
-    return {"result": client.create_or_update_file(req.repo, req.path, req.content, req.message, req.branch)}
+async def create_or_update_file(req: CreateOrUpdateFileRequest):
+    return {"result": await client.create_or_update_file(req.repo, req.path, req.content, req.message, req.branch)}
+
+
+@app.post("/repos/commit")
+async def commit_files(req: CommitFilesRequest):
+    return {"result": await client.commit_files(req.repo, req.branch, req.files, req.message)}
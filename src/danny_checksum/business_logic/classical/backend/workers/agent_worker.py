@@ -0,0 +1,234 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+from typing import AsyncIterable
+
+from dotenv import load_dotenv
+from pydantic_ai import Agent, RunContext
+from pydantic_ai.messages import (
+    AgentStreamEvent,
+    ModelMessage,
+    PartDeltaEvent,
+    PartStartEvent,
+    TextPart,
+    TextPartDelta,
+)
+
+from danny_checksum.business_logic.agentic.with_side_effects.onboarding_agent import create_agent
+from danny_checksum.business_logic.classical.backend.workers.history_store import HistoryStore
+from danny_checksum.connectors.chat_programs.slack_client import SlackClient
+from danny_checksum.connectors.database import agent_job_dao, onboarding_dao, slack_thread_dao
+from danny_checksum.connectors.database.engine import use_session
+from danny_checksum.connectors.database.models import AgentJob
+
+DEFAULT_WORKERS = 4
+
+# An agent run that holds a job longer than this is assumed dead and the job is re-run
+LEASE_SECONDS = 600
+
+# Failed jobs are retried after RETRY_BASE_SECONDS, doubling on each attempt
+RETRY_BASE_SECONDS = 30
+
+# How long an idle worker waits before looking for work again
+IDLE_SECONDS = 1
+
+# While streaming a reply, edit the Slack message at most this often
+STREAM_UPDATE_SECONDS = 1.0
+
+STREAM_PLACEHOLDER = "_Thinking…_"
+
+# Shared by every worker thread in this process; built on first use, after .env is loaded
+_history_store: HistoryStore | None = None
+_history_store_lock = threading.Lock()
+
+
+def history_store() -> HistoryStore:
+    global _history_store
+    with _history_store_lock:
+        if _history_store is None:
+            _history_store = HistoryStore.from_env()
+        return _history_store
+
+
+def worker_id(index: int) -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{index}"
+
+
+def streaming_enabled() -> bool:
+    """Stream replies into Slack as they're generated, unless SLACK_STREAM_REPLIES=0."""
+    return os.environ.get("SLACK_STREAM_REPLIES", "1") != "0"
+
+
+async def _stream_reply(
+    client: SlackClient,
+    agent: Agent,
+    channel_id: str,
+    thread_ts: str,
+    text: str,
+    history: list[ModelMessage] | None,
+) -> tuple[str, list[ModelMessage]]:
+    """Post a placeholder, then edit it as the agent's reply streams in.
+
+    The run goes through tool calls to its final answer, as run_sync does;
+    text the model writes along the way is shown until that answer replaces it.
+    """
+    reply_ts = client.post_message(channel_id, STREAM_PLACEHOLDER, thread_ts=thread_ts)["ts"]
+    chunks: list[str] = []
+    last_update = 0.0
+
+    async def show_text(ctx: RunContext, events: AsyncIterable[AgentStreamEvent]) -> None:
+        nonlocal last_update
+        async for event in events:
+            if isinstance(event, PartStartEvent) and isinstance(event.part, TextPart):
+                if chunks:
+                    chunks.append("\n\n")
+                chunks.append(event.part.content)
+            elif isinstance(event, PartDeltaEvent) and isinstance(event.delta, TextPartDelta):
+                chunks.append(event.delta.content_delta)
+            else:
+                continue
+            now = time.monotonic()
+            if now - last_update >= STREAM_UPDATE_SECONDS and "".join(chunks).strip():
+                client.update_message(channel_id, reply_ts, "".join(chunks))
+                last_update = now
+
+    try:
+        result = await agent.run(text, message_history=history, event_stream_handler=show_text)
+        client.update_message(channel_id, reply_ts, result.output)
+        return reply_ts, result.all_messages()
+    except Exception:
+        # Don't leave a half-written answer behind for the retry to duplicate
+        client.delete_message(channel_id, reply_ts)
+        raise
+
+
+def answer(
+    client: SlackClient,
+    agent: Agent,
+    channel_id: str,
+    thread_ts: str,
+    text: str,
+    history: list[ModelMessage] | None = None,
+) -> tuple[str | None, list[ModelMessage]]:
+    """Run the agent on text and post its reply in the thread.
+
+    Returns the reply's ts and the full message history.
+    """
+    if streaming_enabled():
+        return asyncio.run(_stream_reply(client, agent, channel_id, thread_ts, text, history))
+    agent_result = agent.run_sync(text, message_history=history)
+    reply_data = client.post_message(channel_id, agent_result.output, thread_ts=thread_ts)
+    return reply_data.get("ts"), agent_result.all_messages()
+
+
+def run_new_message(client: SlackClient, payload: dict) -> None:
+    """Answer a new top-level message in a fresh onboarding thread."""
+    channel_id = payload["channel_id"]
+    ts = payload["ts"]
+
+    # A retried job reuses the session from the earlier attempt
+    with use_session() as session:
+        thread = slack_thread_dao.get_thread_by_ts(ts, session)
+        if thread is None:
+            session_id = onboarding_dao.create_session(phase="sales", session=session)
+            thread = slack_thread_dao.create_thread(channel_id, ts, session_id, session)
+    if thread.last_reply_ts is not None:
+        return
+
+    agent = create_agent(
+        role="sales", session_id=thread.session_id, channel_name=payload["channel_name"]
+    )
+    reply_ts, history = answer(client, agent, channel_id, ts, payload["text"])
+
+    # Persist message history
+    history_store().save(thread, history, reply_ts or ts)
+
+
+def run_thread_replies(client: SlackClient, payload: dict) -> None:
+    """Answer user replies in a tracked thread that arrived after its last bot reply."""
+    channel_id = payload["channel_id"]
+    thread = slack_thread_dao.get_thread_by_ts(payload["thread_ts"])
+    if thread is None:
+        raise ValueError(f"SlackThread with thread_ts={payload['thread_ts']!r} not found")
+
+    # An earlier job for this thread may already have answered some of these
+    replies = [
+        r for r in payload["replies"]
+        if thread.last_reply_ts is None or r["ts"] > thread.last_reply_ts
+    ]
+    if not replies:
+        return
+
+    # Load existing message history
+    history = history_store().load(thread)
+
+    # Recreate agent for this session
+    agent = create_agent(
+        role="sales", session_id=thread.session_id, channel_name=payload["channel_name"]
+    )
+
+    if payload.get("coalesce"):
+        # Answer a burst of replies in a single agent turn
+        replies = [{"ts": replies[-1]["ts"], "text": "\n\n".join(r["text"] for r in replies)}]
+
+    for reply in replies:
+        reply_ts, history = answer(
+            client, agent, channel_id, thread.thread_ts, reply["text"], history
+        )
+
+        # Persist after each reply so a retry doesn't answer it again
+        history_store().save(thread, history, reply_ts or reply["ts"])
+
+
+JOB_HANDLERS = {
+    "new_message": run_new_message,
+    "thread_replies": run_thread_replies,
+}
+
+
+def run_job(client: SlackClient, job: AgentJob) -> None:
+    JOB_HANDLERS[job.kind](client, json.loads(job.payload_json))
+
+
+def process_next_job(client: SlackClient, worker: str) -> bool:
+    """Claim and run one job. Returns False if there was nothing to do."""
+    job = agent_job_dao.claim(worker, LEASE_SECONDS)
+    if job is None:
+        return False
+    print(f"Agent worker {worker}: running {job.kind} job {job.idempotency_key} (attempt {job.attempts})")
+    try:
+        run_job(client, job)
+    except Exception as e:
+        print(f"Agent worker {worker}: {job.kind} job {job.idempotency_key} failed: {e}")
+        agent_job_dao.fail(job.id, str(e), RETRY_BASE_SECONDS * 2 ** (job.attempts - 1))
+        return True
+    agent_job_dao.complete(job.id)
+    return True
+
+
+def run_worker(client: SlackClient, worker: str) -> None:
+    while True:
+        try:
+            if process_next_job(client, worker):
+                continue
+        except Exception as e:
+            print(f"process_next_job error: {e}")
+        time.sleep(IDLE_SECONDS)
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    client = SlackClient.from_token(os.environ["SLACK_AUTH_TOKEN"])
+    workers = int(os.environ.get("AGENT_WORKERS", DEFAULT_WORKERS))
+    print(f"Starting {workers} agent worker(s)")
+    threads = [
+        threading.Thread(target=run_worker, args=(client, worker_id(i)), daemon=True)
+        for i in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
@@ -0,0 +1,100 @@
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from pydantic import TypeAdapter
+from pydantic_ai.messages import ModelMessage
+
+from danny_checksum.connectors.database import slack_thread_dao
+from danny_checksum.connectors.database.models import SlackThread
+
+DEFAULT_CACHE_SIZE = 256
+
+_message_adapter = TypeAdapter(ModelMessage)
+_message_list_adapter = TypeAdapter(list[ModelMessage])
+
+
+@dataclass
+class _Entry:
+    last_reply_ts: str | None
+    messages: list[ModelMessage]
+    stored: int  # how many of messages are already in slack_thread_messages
+
+
+@dataclass
+class HistoryStore:
+    """Agent message histories for Slack threads, stored one message per row.
+
+    Each turn appends only its new messages to slack_thread_messages. Parsed
+    histories are kept in an LRU, and an entry is only used while the
+    thread's last_reply_ts still matches it, so a turn answered elsewhere
+    (another process) forces a reload. Threads from before the table existed
+    are read from slack_threads.message_history_json and copied over on
+    their next turn.
+    """
+
+    max_entries: int = DEFAULT_CACHE_SIZE
+    compress: bool = False
+    _entries: OrderedDict[str, _Entry] = field(default_factory=OrderedDict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @classmethod
+    def from_env(cls) -> "HistoryStore":
+        return cls(compress=os.environ.get("SLACK_HISTORY_COMPRESSION") == "1")
+
+    def _get(self, thread_ts: str, last_reply_ts: str | None) -> _Entry | None:
+        with self._lock:
+            entry = self._entries.get(thread_ts)
+            if entry is None or entry.last_reply_ts != last_reply_ts:
+                return None
+            self._entries.move_to_end(thread_ts)
+            return entry
+
+    def _put(self, thread_ts: str, entry: _Entry) -> None:
+        with self._lock:
+            self._entries[thread_ts] = entry
+            self._entries.move_to_end(thread_ts)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _load(self, thread: SlackThread) -> _Entry:
+        rows = slack_thread_dao.get_history_rows(thread.thread_ts)
+        if rows:
+            messages = [
+                _message_adapter.validate_json(
+                    zlib.decompress(row.data) if row.encoding == "zlib" else row.data
+                )
+                for row in rows
+            ]
+            return _Entry(thread.last_reply_ts, messages, len(rows))
+        if thread.message_history_json:
+            messages = _message_list_adapter.validate_json(thread.message_history_json)
+            return _Entry(thread.last_reply_ts, messages, 0)
+        return _Entry(thread.last_reply_ts, [], 0)
+
+    def load(self, thread: SlackThread) -> list[ModelMessage]:
+        """Return a thread's message history, from the cache if it's current."""
+        entry = self._get(thread.thread_ts, thread.last_reply_ts)
+        if entry is None:
+            entry = self._load(thread)
+            self._put(thread.thread_ts, entry)
+        return list(entry.messages)
+
+    def save(self, thread: SlackThread, messages: list[ModelMessage], last_reply_ts: str) -> None:
+        """Persist a thread's history after a turn, writing only the messages not yet stored.
+
+        Also moves thread.last_reply_ts on to last_reply_ts.
+        """
+        entry = self._get(thread.thread_ts, thread.last_reply_ts) or self._load(thread)
+        encoding = "zlib" if self.compress else "json"
+        new = []
+        for message in messages[entry.stored:]:
+            data = _message_adapter.dump_json(message)
+            new.append(zlib.compress(data) if self.compress else data)
+        slack_thread_dao.append_history(
+            thread.thread_ts, entry.stored, encoding, new, last_reply_ts
+        )
+        thread.last_reply_ts = last_reply_ts
+        self._put(thread.thread_ts, _Entry(last_reply_ts, list(messages), len(messages)))
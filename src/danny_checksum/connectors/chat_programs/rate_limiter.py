@@ -0,0 +1,135 @@
+import threading
+import time
+from dataclasses import dataclass, field
+
+from slack_sdk.http_retry.builtin_handlers import RateLimitErrorRetryHandler
+
+# Requests per minute for Slack's Web API rate-limit tiers
+TIER_1 = 1
+TIER_2 = 20
+TIER_3 = 50
+TIER_4 = 100
+
+METHOD_TIERS = {
+    "auth.test": TIER_4,
+    "chat.delete": TIER_3,
+    "chat.update": TIER_3,
+    "conversations.history": TIER_3,
+    "conversations.info": TIER_3,
+    "conversations.join": TIER_3,
+    "conversations.list": TIER_2,
+    "conversations.replies": TIER_3,
+    "users.conversations": TIER_2,
+}
+
+# chat.postMessage is limited per channel rather than by tier: about one message a second
+POST_MESSAGE_PER_MINUTE = 60
+
+# How many 429s in a row to wait out before giving up and raising
+MAX_RATE_LIMIT_RETRIES = 3
+
+# How long to back off after a 429 that doesn't say
+DEFAULT_RETRY_AFTER_SECONDS = 60.0
+
+
+def retry_after_seconds(headers: dict, default: float = DEFAULT_RETRY_AFTER_SECONDS) -> float:
+    """Return a 429's Retry-After in seconds, matching the header name in any case.
+
+    Slack sends it as `retry-after`; slack_sdk's RateLimitErrorRetryHandler
+    looks it up the same way.
+    """
+    for name, value in headers.items():
+        if name.lower() == "retry-after":
+            try:
+                return float(value)
+            except (TypeError, ValueError):
+                return default
+    return default
+
+
+@dataclass
+class TokenBucket:
+    """Allows `rate` requests per second on average, with bursts of up to `capacity`."""
+
+    rate: float
+    capacity: float
+    _tokens: float = field(init=False, repr=False)
+    _updated_at: float = field(default_factory=time.monotonic, init=False, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        self._tokens = self.capacity
+
+    def acquire(self) -> float:
+        """Take a token, blocking until one is free. Returns how long it waited."""
+        # Callers queue on the lock, so waiters are served roughly in order
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+            self._updated_at = now
+            wait = 0.0
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+                time.sleep(wait)
+                self._tokens = 1.0
+                self._updated_at = time.monotonic()
+            self._tokens -= 1
+            return wait
+
+
+class CountingRateLimitRetryHandler(RateLimitErrorRetryHandler):
+    """Waits out a 429's Retry-After like RateLimitErrorRetryHandler, and counts them."""
+
+    def __init__(self, limiter: "SlackRateLimiter", max_retry_count: int = MAX_RATE_LIMIT_RETRIES):
+        super().__init__(max_retry_count=max_retry_count)
+        self.limiter = limiter
+
+    def prepare_for_next_attempt(self, **kwargs) -> None:
+        self.limiter.rate_limited += 1
+        super().prepare_for_next_attempt(**kwargs)
+
+
+@dataclass
+class SlackRateLimiter:
+    """Client-side token buckets per Slack method, and per channel for posting.
+
+    Keeps us under Slack's published limits so 429s are the exception; the
+    ones that still happen are retried after Retry-After by
+    CountingRateLimitRetryHandler, unless the client leaves them to its
+    caller (the Slack poller pauses its whole scheduler instead).
+    """
+
+    throttled: int = 0
+    throttled_seconds: float = 0.0
+    rate_limited: int = 0
+    _buckets: dict[tuple[str, str | None], TokenBucket] = field(default_factory=dict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def _bucket(self, method: str, channel_id: str | None) -> TokenBucket:
+        key = (method, channel_id)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if method == "chat.postMessage":
+                    per_minute = POST_MESSAGE_PER_MINUTE
+                else:
+                    per_minute = METHOD_TIERS.get(method, TIER_3)
+                # Allow a short burst, but never more than a few seconds' worth
+                bucket = TokenBucket(rate=per_minute / 60, capacity=max(1, per_minute // 20))
+                self._buckets[key] = bucket
+            return bucket
+
+    def wait(self, method: str, channel_id: str | None = None) -> None:
+        """Block until a call to method is allowed. Posts are limited per channel."""
+        waited = self._bucket(method, channel_id if method == "chat.postMessage" else None).acquire()
+        if waited > 0:
+            with self._lock:
+                self.throttled += 1
+                self.throttled_seconds += waited
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "throttled": self.throttled,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+            "rate_limited": self.rate_limited,
+        }
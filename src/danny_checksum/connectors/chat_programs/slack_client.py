@@ -1,17 +1,42 @@
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
 
 from slack_sdk import WebClient
+from slack_sdk.errors import SlackApiError
+
+from danny_checksum.connectors.chat_programs.rate_limiter import (
+    CountingRateLimitRetryHandler,
+    SlackRateLimiter,
+)
 
 
 @dataclass
 class SlackClient:
     client: WebClient
+    limiter: SlackRateLimiter = field(default_factory=SlackRateLimiter)
+    # Channels the bot is in; seeded from users.conversations on first use
+    _member_channels: set[str] | None = field(default=None, repr=False)
+    _membership_lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
 
     @classmethod
-    def from_token(cls, token: str) -> "SlackClient":
-        return cls(client=WebClient(token=token))
+    def from_token(cls, token: str, retry_rate_limits: bool = True) -> "SlackClient":
+        """Build a client from a bot token.
+
+        With retry_rate_limits=False a 429 is raised to the caller as a
+        SlackApiError instead of being waited out in the calling thread.
+        """
+        limiter = SlackRateLimiter()
+        client = WebClient(token=token)
+        if retry_rate_limits:
+            client.retry_handlers.append(CountingRateLimitRetryHandler(limiter))
+        return cls(client=client, limiter=limiter)
+
+    def throttle_stats(self) -> dict[str, float]:
+        """Return how often calls were delayed by our own token buckets, and by Slack's 429s."""
+        return self.limiter.stats()
 
     def list_channels(self, limit: int = 200, types: str = "public_channel") -> str:
+        self.limiter.wait("conversations.list")
         result = self.client.conversations_list(limit=limit, types=types)
         channels = result.get("channels", [])
         lines = []
@@ -21,11 +46,59 @@ class SlackClient:
         return "\n".join(lines) if lines else "No channels found."
 
     def join_channel(self, channel_id: str) -> str:
+        self.limiter.wait("conversations.join")
         self.client.conversations_join(channel=channel_id)
+        self.set_membership(channel_id, True)
         return f"Joined channel {channel_id}."
 
+    def _seed_membership(self) -> set[str]:
+        with self._membership_lock:
+            if self._member_channels is None:
+                channels = set()
+                cursor = None
+                while True:
+                    self.limiter.wait("users.conversations")
+                    result = self.client.users_conversations(
+                        types="public_channel,private_channel",
+                        exclude_archived=True,
+                        limit=1000,
+                        cursor=cursor,
+                    )
+                    channels.update(ch["id"] for ch in result.get("channels", []))
+                    cursor = (result.get("response_metadata") or {}).get("next_cursor")
+                    if not cursor:
+                        break
+                self._member_channels = channels
+            return self._member_channels
+
+    def set_membership(self, channel_id: str, is_member: bool) -> None:
+        """Record that the bot joined or left a channel, e.g. from a membership event."""
+        if self._member_channels is None:
+            return
+        if is_member:
+            self._member_channels.add(channel_id)
+        else:
+            self._member_channels.discard(channel_id)
+
+    def ensure_joined(self, channel_id: str) -> None:
+        """Join a channel unless the bot is already in it."""
+        if channel_id not in self._seed_membership():
+            self.join_channel(channel_id)
+
+    def _rejoin_on_not_in_channel(self, channel_id: str, call):
+        """Make a channel read, joining and retrying once if we turn out not to be a member."""
+        try:
+            return call()
+        except SlackApiError as e:
+            if e.response.get("error") != "not_in_channel":
+                raise
+            self.set_membership(channel_id, False)
+            self.join_channel(channel_id)
+            return call()
+
     def read_messages(self, channel_id: str, limit: int = 50) -> str:
-        self.client.conversations_join(channel=channel_id)
+        self.ensure_joined(channel_id)
+        self.limiter.wait("conversations.history")
         result = self.client.conversations_history(channel=channel_id, limit=limit)
         messages = result.get("messages", [])
         lines = []
@@ -36,13 +109,53 @@ class SlackClient:
             lines.append(f"[{ts}] {user}: {text}")
         return "\n".join(lines) if lines else "No messages found."
 
+    def read_history_page(
+        self,
+        channel_id: str,
+        oldest: str | None = None,
+        cursor: str | None = None,
+        limit: int = 200,
+        latest: str | None = None,
+        inclusive: bool = False,
+    ) -> tuple[list[dict], str | None]:
+        """Fetch one page of channel history, newest first, with the cursor for the next page (None if last)."""
+        kwargs = {"channel": channel_id, "limit": limit}
+        if oldest is not None:
+            kwargs["oldest"] = oldest
+        if latest is not None:
+            kwargs["latest"] = latest
+        if inclusive:
+            kwargs["inclusive"] = True
+        if cursor is not None:
+            kwargs["cursor"] = cursor
+
+        def _call():
+            self.limiter.wait("conversations.history")
+            return self.client.conversations_history(**kwargs)
+
+        result = self._rejoin_on_not_in_channel(channel_id, _call)
+        next_cursor = (result.get("response_metadata") or {}).get("next_cursor") or None
+        return result.get("messages", []), next_cursor
+
     def post_message(self, channel_id: str, text: str, thread_ts: str | None = None) -> dict:
         """Post a message to a channel, optionally in a thread. Returns result data."""
+        # Waits its turn per channel, so a burst of replies is queued rather than rejected
+        self.limiter.wait("chat.postMessage", channel_id)
         result = self.client.chat_postMessage(
             channel=channel_id, text=text, thread_ts=thread_ts
         )
         return result.data
 
+    def update_message(self, channel_id: str, ts: str, text: str) -> dict:
+        """Replace the text of a message the bot posted. Returns result data."""
+        self.limiter.wait("chat.update")
+        result = self.client.chat_update(channel=channel_id, ts=ts, text=text)
+        return result.data
+
+    def delete_message(self, channel_id: str, ts: str) -> None:
+        self.limiter.wait("chat.delete")
+        self.client.chat_delete(channel=channel_id, ts=ts)
+
     def read_thread_replies(
         self, channel_id: str, thread_ts: str, oldest: str | None = None
     ) -> list[dict]:
@@ -50,17 +163,24 @@ class SlackClient:
         kwargs = {"channel": channel_id, "ts": thread_ts}
         if oldest is not None:
             kwargs["oldest"] = oldest
-        result = self.client.conversations_replies(**kwargs)
+
+        def _call():
+            self.limiter.wait("conversations.replies")
+            return self.client.conversations_replies(**kwargs)
+
+        result = self._rejoin_on_not_in_channel(channel_id, _call)
         messages = result.get("messages", [])
         # The first message is the parent; return only replies
         return [m for m in messages if m.get("ts") != thread_ts]
 
     def get_bot_user_id(self) -> str:
         """Return the bot's own user_id via auth.test."""
+        self.limiter.wait("auth.test")
         result = self.client.auth_test()
         return result["user_id"]
 
     def get_channel_name(self, channel_id: str) -> str:
         """Return the human-readable channel name for a channel ID."""
+        self.limiter.wait("conversations.info")
         result = self.client.conversations_info(channel=channel_id)
         return result["channel"]["name"]
@@ -0,0 +1,140 @@
+import json
+import time
+from typing import Any
+
+from sqlalchemy import Update, and_, exists, or_, select, update
+from sqlalchemy.orm import Session, aliased
+
+from danny_checksum.connectors.database.engine import get_session, upsert_insert, use_session
+from danny_checksum.connectors.database.models import AgentJob
+
+MAX_ATTEMPTS = 5
+
+
+def enqueue(
+    kind: str,
+    idempotency_key: str,
+    group_key: str,
+    payload: dict[str, Any],
+    delay: float = 0.0,
+    session: Session | None = None,
+) -> bool:
+    """Add a pending job. Returns False if a job with this idempotency key already exists."""
+    with use_session(session) as session:
+        # ON CONFLICT DO NOTHING rather than catching IntegrityError, which would
+        # roll back the rest of a caller's transaction
+        result = session.execute(
+            upsert_insert(session, AgentJob)
+            .values(
+                kind=kind,
+                idempotency_key=idempotency_key,
+                group_key=group_key,
+                payload_json=json.dumps(payload),
+                status="pending",
+                attempts=0,
+                available_at=time.time() + delay,
+            )
+            .on_conflict_do_nothing(index_elements=["idempotency_key"])
+        )
+        return result.rowcount == 1
+
+
+def supersede_pending(
+    kind: str, group_key: str, keep_key: str, session: Session | None = None
+) -> int:
+    """Drop a group's pending jobs of a kind, other than keep_key, whose work keep_key covers.
+
+    Returns how many were dropped.
+    """
+    with use_session(session) as session:
+        result = session.execute(
+            update(AgentJob)
+            .where(
+                AgentJob.kind == kind,
+                AgentJob.group_key == group_key,
+                AgentJob.status == "pending",
+                AgentJob.idempotency_key != keep_key,
+            )
+            .values(status="superseded")
+        )
+        return result.rowcount
+
+
+def _claim_statement(worker_id: str, lease_seconds: float, now: float) -> Update:
+    other = aliased(AgentJob)
+    leased = or_(
+        AgentJob.status == "pending",
+        and_(AgentJob.status == "running", AgentJob.lease_expires_at < now),
+    )
+    group_busy = exists().where(
+        other.group_key == AgentJob.group_key,
+        other.id != AgentJob.id,
+        or_(
+            and_(other.status == "running", other.lease_expires_at >= now),
+            # An earlier job in the group waiting on a retry holds back later ones
+            and_(other.status == "pending", other.id < AgentJob.id),
+        ),
+    )
+    next_id = (
+        select(AgentJob.id)
+        .where(leased, AgentJob.available_at <= now, AgentJob.attempts < MAX_ATTEMPTS, ~group_busy)
+        .order_by(AgentJob.available_at, AgentJob.id)
+        .limit(1)
+        # On Postgres, under READ COMMITTED, a job another worker is claiming is skipped
+        # rather than claimed twice. SQLite serializes writers and renders no FOR UPDATE.
+        .with_for_update(skip_locked=True, of=AgentJob)
+        .scalar_subquery()
+    )
+    return (
+        update(AgentJob)
+        .where(AgentJob.id == next_id)
+        .values(
+            status="running",
+            attempts=AgentJob.attempts + 1,
+            lease_owner=worker_id,
+            lease_expires_at=now + lease_seconds,
+        )
+        .returning(AgentJob)
+    )
+
+
+def claim(worker_id: str, lease_seconds: float) -> AgentJob | None:
+    """Lease the oldest runnable job to worker_id and return it, or None if there isn't one.
+
+    A job is runnable if it's pending and available, or running with an
+    expired lease (its worker died). Jobs whose group already has a job
+    under a live lease are skipped, so each thread is handled in order.
+    The claim is a single UPDATE whose job lookup skips locked rows, so
+    concurrent workers can't take the same job.
+    """
+    with get_session() as session:
+        job = session.scalars(_claim_statement(worker_id, lease_seconds, time.time())).first()
+        session.commit()
+        if job is not None:
+            session.refresh(job)
+        return job
+
+
+def complete(job_id: int) -> None:
+    """Mark a job as done."""
+    with get_session() as session:
+        session.execute(
+            update(AgentJob)
+            .where(AgentJob.id == job_id)
+            .values(status="done", lease_owner=None, lease_expires_at=None)
+        )
+        session.commit()
+
+
+def fail(job_id: int, error: str, retry_delay: float) -> None:
+    """Record a failed attempt; retry after retry_delay, or give up after MAX_ATTEMPTS."""
+    with get_session() as session:
+        obj = session.get(AgentJob, job_id)
+        if obj is None:
+            raise ValueError(f"AgentJob with id={job_id!r} not found")
+        obj.status = "failed" if obj.attempts >= MAX_ATTEMPTS else "pending"
+        obj.available_at = time.time() + retry_delay
+        obj.lease_owner = None
+        obj.lease_expires_at = None
+        obj.last_error = error
+        session.commit()
@@ -0,0 +1,27 @@
+from sqlalchemy import select
+
+from danny_checksum.connectors.database.engine import get_session, upsert_insert
+from danny_checksum.connectors.database.models import ChecksumChange
+
+
+def record_change(repo: str, commit_sha: str) -> None:
+    """Record a commit that touched a repo's .checksum. No-op if already recorded."""
+    with get_session() as session:
+        session.execute(
+            upsert_insert(session, ChecksumChange)
+            .values(repo=repo, commit_sha=commit_sha)
+            .on_conflict_do_nothing(index_elements=["repo", "commit_sha"])
+        )
+        session.commit()
+
+
+def list_changes(repo: str) -> list[ChecksumChange]:
+    """Return the recorded .checksum changes for a repo, oldest first."""
+    with get_session() as session:
+        return list(
+            session.scalars(
+                select(ChecksumChange)
+                .where(ChecksumChange.repo == repo)
+                .order_by(ChecksumChange.id)
+            ).all()
+        )
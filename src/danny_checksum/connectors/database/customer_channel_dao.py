@@ -31,6 +31,16 @@ def remove_channel(channel_id: str) -> None:
             session.commit()
 
 
+def get_channel(channel_id: str) -> CustomerSlackChannel | None:
+    """Return the customer channel with this channel_id, or None if it isn't monitored."""
+    with get_session() as session:
+        return session.scalars(
+            select(CustomerSlackChannel).where(
+                CustomerSlackChannel.channel_id == channel_id
+            )
+        ).first()
+
+
 def list_channels() -> list[CustomerSlackChannel]:
     """Return all customer channels."""
     with get_session() as session:
@@ -1,12 +1,103 @@
+import os
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from typing import Any, Iterator
 
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import Session
 
 PROJECT_ROOT = Path(__file__).resolve().parents[4]
 DB_PATH = PROJECT_ROOT / "localdev.db"
+DEFAULT_DATABASE_URL = f"sqlite:///{DB_PATH}"
+
+# Applied to every new SQLite connection. WAL lets the pollers, agent workers
+# and web requests read while one of them writes; NORMAL is durable under WAL
+# and skips an fsync per commit; busy_timeout waits for the write lock rather
+# than failing with "database is locked".
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": 10_000,
+    "mmap_size": 256 * 1024 * 1024,
+}
+
+# Connection pool sizing for server databases (Postgres)
+DEFAULT_POOL_SIZE = 10
+DEFAULT_MAX_OVERFLOW = 20
+POOL_RECYCLE_SECONDS = 1800
+
+
+def database_url() -> str:
+    """Return DATABASE_URL, defaulting to localdev.db in the project root."""
+    return os.environ.get("DATABASE_URL", DEFAULT_DATABASE_URL)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for name, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {name} = {value}")
+    cursor.close()
+
+
+def make_engine(url: str | None = None, **kwargs: Any) -> Engine:
+    """Create an engine for url (default: DATABASE_URL), tuned for its backend.
+
+    Shared by the app and the Alembic migrations. Extra kwargs go to
+    create_engine; passing a poolclass skips the pool sizing.
+    """
+    url = make_url(url or database_url())
+    if url.get_backend_name() == "sqlite":
+        engine = create_engine(url, **kwargs)
+        event.listen(engine, "connect", _apply_sqlite_pragmas)
+        return engine
+
+    if "poolclass" not in kwargs:
+        kwargs.setdefault("pool_size", int(os.environ.get("DATABASE_POOL_SIZE", DEFAULT_POOL_SIZE)))
+        kwargs.setdefault(
+            "max_overflow", int(os.environ.get("DATABASE_MAX_OVERFLOW", DEFAULT_MAX_OVERFLOW))
+        )
+        kwargs.setdefault("pool_recycle", POOL_RECYCLE_SECONDS)
+    kwargs.setdefault("pool_pre_ping", True)
+    return create_engine(url, **kwargs)
+
+
+# Built on first use, so DATABASE_URL is read after the entry point has loaded .env
+engine: Engine | None = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    global engine
+    with _engine_lock:
+        if engine is None:
+            engine = make_engine()
+        return engine
 
-engine = create_engine(f"sqlite:///{DB_PATH}")
 
 def get_session() -> Session:
-    return Session(engine)
+    return Session(get_engine())
+
+
+@contextmanager
+def use_session(session: Session | None = None) -> Iterator[Session]:
+    """Yield the caller's session, or a new one that's committed on exit.
+
+    DAO functions take an optional session so a caller can run several of
+    them in one transaction; the caller then owns the commit. Objects
+    loaded through a new session stay readable after it closes.
+    """
+    if session is not None:
+        yield session
+        return
+    with Session(get_engine(), expire_on_commit=False) as session:
+        yield session
+        session.commit()
+
+
+def upsert_insert(session: Session, model: type) -> Any:
+    """Return an INSERT for model supporting on_conflict_do_nothing / on_conflict_do_update."""
+    dialect = postgresql if session.get_bind().dialect.name == "postgresql" else sqlite
+    return dialect.insert(model)
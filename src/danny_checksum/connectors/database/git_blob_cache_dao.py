@@ -0,0 +1,35 @@
+from sqlalchemy import delete, select
+
+from danny_checksum.connectors.database.engine import get_session, upsert_insert
+from danny_checksum.connectors.database.models import GitBlobCache
+
+
+def get_entry(repo: str, commit_sha: str, path: str) -> GitBlobCache | None:
+    """Return the cached blob lookup for a path at a commit, or None if not cached."""
+    with get_session() as session:
+        return session.scalars(
+            select(GitBlobCache).where(
+                GitBlobCache.repo == repo,
+                GitBlobCache.commit_sha == commit_sha,
+                GitBlobCache.path == path,
+            )
+        ).first()
+
+
+def save_entry(repo: str, commit_sha: str, path: str, blob_sha: str | None) -> None:
+    """Record the blob SHA of a path at a commit. No-op if already recorded."""
+    with get_session() as session:
+        session.execute(
+            upsert_insert(session, GitBlobCache)
+            .values(repo=repo, commit_sha=commit_sha, path=path, blob_sha=blob_sha)
+            .on_conflict_do_nothing(index_elements=["repo", "commit_sha", "path"])
+        )
+        session.commit()
+
+
+def prune(max_entries: int) -> None:
+    """Delete the oldest entries beyond max_entries."""
+    with get_session() as session:
+        stale_ids = select(GitBlobCache.id).order_by(GitBlobCache.id.desc()).offset(max_entries)
+        session.execute(delete(GitBlobCache).where(GitBlobCache.id.in_(stale_ids)))
+        session.commit()
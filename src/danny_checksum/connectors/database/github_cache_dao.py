@@ -0,0 +1,47 @@
+from sqlalchemy import delete, func, select
+
+from danny_checksum.connectors.database.engine import get_session, upsert_insert
+from danny_checksum.connectors.database.models import GitHubResponseCache
+
+
+def get_response(cache_key: str) -> GitHubResponseCache | None:
+    """Return the cached GitHub response for a key, or None if not cached."""
+    with get_session() as session:
+        return session.scalars(
+            select(GitHubResponseCache).where(GitHubResponseCache.cache_key == cache_key)
+        ).first()
+
+
+def save_response(
+    cache_key: str, etag: str | None, last_modified: str | None, body_json: str
+) -> None:
+    """Create or update the cached GitHub response for a key."""
+    with get_session() as session:
+        insert = upsert_insert(session, GitHubResponseCache).values(
+            cache_key=cache_key, etag=etag, last_modified=last_modified, body_json=body_json
+        )
+        session.execute(
+            insert.on_conflict_do_update(
+                index_elements=["cache_key"],
+                set_={
+                    "etag": insert.excluded.etag,
+                    "last_modified": insert.excluded.last_modified,
+                    "body_json": insert.excluded.body_json,
+                    # onupdate doesn't fire for ON CONFLICT, and prune orders by this
+                    "updated_at": func.now(),
+                },
+            )
+        )
+        session.commit()
+
+
+def prune(max_entries: int) -> None:
+    """Delete the least recently written responses beyond max_entries."""
+    with get_session() as session:
+        stale_ids = select(GitHubResponseCache.id).order_by(
+            GitHubResponseCache.updated_at.desc(), GitHubResponseCache.id.desc()
+        ).offset(max_entries)
+        session.execute(
+            delete(GitHubResponseCache).where(GitHubResponseCache.id.in_(stale_ids))
+        )
+        session.commit()
@@ -1,4 +1,14 @@
-from sqlalchemy import Column, DateTime, Integer, String, func
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Float,
+    Index,
+    Integer,
+    LargeBinary,
+    String,
+    UniqueConstraint,
+    func,
+)
 from sqlalchemy.orm import DeclarativeBase
 
 
@@ -8,6 +18,7 @@ class Base(DeclarativeBase):
 
 class CustomerRepo(Base):
     __tablename__ = "customer_repos"
+    __table_args__ = (Index("ix_customer_repos_name", "name", unique=True),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String, nullable=False)
@@ -16,6 +27,7 @@ class CustomerRepo(Base):
 
 class Deployment(Base):
     __tablename__ = "deployments"
+    __table_args__ = (Index("ix_deployments_component_created_at", "component", "created_at"),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     component = Column(String, nullable=False)
@@ -33,13 +45,28 @@ class SlackChannel(Base):
 
 class SlackThread(Base):
     __tablename__ = "slack_threads"
+    __table_args__ = (Index("ix_slack_threads_channel_id_status", "channel_id", "status"),)
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     channel_id = Column(String, nullable=False)
     thread_ts = Column(String, nullable=False, unique=True)
     session_id = Column(Integer, nullable=False)
-    message_history_json = Column(String, nullable=True)
+    message_history_json = Column(String, nullable=True)  # legacy; history now lives in slack_thread_messages
     last_reply_ts = Column(String, nullable=True)
+    status = Column(String, nullable=False, server_default="active")  # active, archived
+    next_poll_at = Column(Float, nullable=True)  # epoch seconds; None means poll next cycle
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+
+class SlackThreadMessage(Base):
+    __tablename__ = "slack_thread_messages"
+    __table_args__ = (UniqueConstraint("thread_ts", "seq"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    thread_ts = Column(String, nullable=False)
+    seq = Column(Integer, nullable=False)  # position in the agent's message history
+    encoding = Column(String, nullable=False)  # json, zlib
+    data = Column(LargeBinary, nullable=False)  # one serialized ModelMessage
     created_at = Column(DateTime, nullable=False, server_default=func.now())
 
 
@@ -52,6 +79,65 @@ class CustomerSlackChannel(Base):
     created_at = Column(DateTime, nullable=False, server_default=func.now())
 
 
+class GitHubResponseCache(Base):
+    __tablename__ = "github_response_cache"
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cache_key = Column(String, nullable=False, unique=True)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    body_json = Column(String, nullable=False)
+    updated_at = Column(
+        DateTime, nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+
+
+class GitBlobCache(Base):
+    __tablename__ = "git_blob_cache"
+    __table_args__ = (UniqueConstraint("repo", "commit_sha", "path"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    repo = Column(String, nullable=False)
+    commit_sha = Column(String, nullable=False)
+    path = Column(String, nullable=False)
+    blob_sha = Column(String, nullable=True)  # None if the path doesn't exist at the commit
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+
+class ChecksumChange(Base):
+    __tablename__ = "checksum_changes"
+    __table_args__ = (UniqueConstraint("repo", "commit_sha"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    repo = Column(String, nullable=False)
+    commit_sha = Column(String, nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+
+class AgentJob(Base):
+    __tablename__ = "agent_jobs"
+    __table_args__ = (
+        Index("ix_agent_jobs_status_available_at", "status", "available_at"),
+        Index("ix_agent_jobs_group_key_status", "group_key", "status"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    kind = Column(String, nullable=False)
+    idempotency_key = Column(String, nullable=False, unique=True)
+    group_key = Column(String, nullable=False)  # jobs sharing a group run one at a time, in order
+    payload_json = Column(String, nullable=False)
+    status = Column(String, nullable=False, default="pending")  # pending, running, done, failed, superseded
+    attempts = Column(Integer, nullable=False, default=0)
+    available_at = Column(Float, nullable=False)  # epoch seconds
+    lease_owner = Column(String, nullable=True)
+    lease_expires_at = Column(Float, nullable=True)  # epoch seconds
+    last_error = Column(String, nullable=True)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    updated_at = Column(
+        DateTime, nullable=False, server_default=func.now(), onupdate=func.now()
+    )
+
+
 class OnboardingSession(Base):
     __tablename__ = "onboarding_sessions"
 
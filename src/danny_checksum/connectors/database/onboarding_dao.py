@@ -1,8 +1,9 @@
 import json
 
 from sqlalchemy import select
+from sqlalchemy.orm import Session
 
-from danny_checksum.connectors.database.engine import get_session
+from danny_checksum.connectors.database.engine import get_session, use_session
 from danny_checksum.connectors.database.models import OnboardingSession
 
 ONBOARDING_FIELDS = [
@@ -21,12 +22,12 @@ ONBOARDING_FIELDS = [
 _JSON_FIELDS = {"api_endpoints", "test_descriptions"}
 
 
-def create_session(phase: str = "sales") -> int:
+def create_session(phase: str = "sales", session: Session | None = None) -> int:
     """Create a new onboarding session and return its ID."""
-    with get_session() as session:
+    with use_session(session) as session:
         obj = OnboardingSession(phase=phase)
         session.add(obj)
-        session.commit()
+        session.flush()
         return obj.id
 
 
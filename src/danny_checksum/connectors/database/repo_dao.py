@@ -1,6 +1,6 @@
-from sqlalchemy import select
+from sqlalchemy import select, update
 
-from danny_checksum.connectors.database.engine import get_session
+from danny_checksum.connectors.database.engine import get_session, upsert_insert
 from danny_checksum.connectors.database.models import CustomerRepo
 
 
@@ -18,13 +18,64 @@ def get_last_sha(repo_name: str) -> str | None:
 def set_last_sha(repo_name: str, sha: str) -> None:
     """Create or update the last processed SHA for a repo."""
     with get_session() as session:
-        customer_repo = session.scalars(
-            select(CustomerRepo).where(CustomerRepo.name == repo_name)
-        ).first()
+        insert = upsert_insert(session, CustomerRepo).values(
+            name=repo_name, last_git_sha_successfully_processed=sha
+        )
+        session.execute(
+            insert.on_conflict_do_update(
+                index_elements=["name"],
+                set_={"last_git_sha_successfully_processed": insert.excluded.last_git_sha_successfully_processed},
+            )
+        )
+        session.commit()
 
-        if customer_repo is None:
-            customer_repo = CustomerRepo(name=repo_name)
-            session.add(customer_repo)
 
-        customer_repo.last_git_sha_successfully_processed = sha
+def advance_last_sha(repo_name: str, previous_sha: str | None, sha: str) -> bool:
+    """Move a repo's last processed SHA from previous_sha to sha.
+
+    A compare-and-set: returns False, changing nothing, if another poll has
+    moved the SHA on since previous_sha was read.
+    """
+    with get_session() as session:
+        result = session.execute(
+            update(CustomerRepo)
+            .where(
+                CustomerRepo.name == repo_name,
+                CustomerRepo.last_git_sha_successfully_processed.is_not_distinct_from(previous_sha),
+            )
+            .values(last_git_sha_successfully_processed=sha)
+        )
+        if result.rowcount == 0 and previous_sha is None:
+            # Not tracked yet: only the first poll to get here creates the row
+            result = session.execute(
+                upsert_insert(session, CustomerRepo)
+                .values(name=repo_name, last_git_sha_successfully_processed=sha)
+                .on_conflict_do_nothing(index_elements=["name"])
+            )
         session.commit()
+        return result.rowcount == 1
+
+
+def add_repo(repo_name: str) -> None:
+    """Insert a customer repo. No-op if it already exists."""
+    with get_session() as session:
+        session.execute(
+            upsert_insert(session, CustomerRepo)
+            .values(name=repo_name)
+            .on_conflict_do_nothing(index_elements=["name"])
+        )
+        session.commit()
+
+
+def list_repos() -> list[CustomerRepo]:
+    """Return all customer repos."""
+    with get_session() as session:
+        return list(session.scalars(select(CustomerRepo)).all())
+
+
+def get_repo(repo_name: str) -> CustomerRepo | None:
+    """Return the customer repo with this name, or None if it isn't tracked."""
+    with get_session() as session:
+        return session.scalars(
+            select(CustomerRepo).where(CustomerRepo.name == repo_name)
+        ).first()
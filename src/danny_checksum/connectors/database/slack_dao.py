@@ -1,12 +1,13 @@
 from sqlalchemy import select
+from sqlalchemy.orm import Session
 
-from danny_checksum.connectors.database.engine import get_session
+from danny_checksum.connectors.database.engine import use_session
 from danny_checksum.connectors.database.models import SlackChannel
 
 
-def get_last_thread_ts(channel_id: str) -> str | None:
+def get_last_thread_ts(channel_id: str, session: Session | None = None) -> str | None:
     """Return the last seen thread_ts for a channel, or None if not found."""
-    with get_session() as session:
+    with use_session(session) as session:
         channel = session.scalars(
             select(SlackChannel).where(SlackChannel.channel_id == channel_id)
         ).first()
@@ -15,9 +16,9 @@ def get_last_thread_ts(channel_id: str) -> str | None:
         return channel.last_thread_ts
 
 
-def set_last_thread_ts(channel_id: str, thread_ts: str) -> None:
+def set_last_thread_ts(channel_id: str, thread_ts: str, session: Session | None = None) -> None:
     """Create or update the last seen thread_ts for a channel."""
-    with get_session() as session:
+    with use_session(session) as session:
         channel = session.scalars(
             select(SlackChannel).where(SlackChannel.channel_id == channel_id)
         ).first()
@@ -27,4 +28,3 @@ def set_last_thread_ts(channel_id: str, thread_ts: str) -> None:
             session.add(channel)
 
         channel.last_thread_ts = thread_ts
-        session.commit()
@@ -1,49 +1,158 @@
-from sqlalchemy import select
+from typing import NamedTuple
 
-from danny_checksum.connectors.database.engine import get_session
-from danny_checksum.connectors.database.models import SlackThread
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
 
+from danny_checksum.connectors.database.engine import get_session, use_session
+from danny_checksum.connectors.database.models import SlackThread, SlackThreadMessage
 
-def create_thread(channel_id: str, thread_ts: str, session_id: int) -> SlackThread:
+
+class ThreadCursor(NamedTuple):
+    """The columns the poller needs to check a thread, without its message history."""
+
+    thread_ts: str
+    last_reply_ts: str | None
+    session_id: int
+    status: str
+    next_poll_at: float | None
+
+
+_CURSOR_COLUMNS = (
+    SlackThread.thread_ts,
+    SlackThread.last_reply_ts,
+    SlackThread.session_id,
+    SlackThread.status,
+    SlackThread.next_poll_at,
+)
+
+
+def create_thread(
+    channel_id: str, thread_ts: str, session_id: int, session: Session | None = None
+) -> SlackThread:
     """Create a SlackThread row and return it."""
-    with get_session() as session:
+    with use_session(session) as session:
         obj = SlackThread(
             channel_id=channel_id, thread_ts=thread_ts, session_id=session_id
         )
         session.add(obj)
-        session.commit()
+        session.flush()
         session.refresh(obj)
         return obj
 
 
-def get_thread_by_ts(thread_ts: str) -> SlackThread | None:
+def get_thread_by_ts(thread_ts: str, session: Session | None = None) -> SlackThread | None:
     """Look up a SlackThread by its thread_ts."""
-    with get_session() as session:
+    with use_session(session) as session:
         return session.scalars(
             select(SlackThread).where(SlackThread.thread_ts == thread_ts)
         ).first()
 
 
-def get_active_threads(channel_id: str) -> list[SlackThread]:
-    """Return all tracked threads for a channel."""
+def get_existing_thread_ts(thread_ts_list: list[str], session: Session | None = None) -> set[str]:
+    """Return which of these ts values already have a SlackThread, in one query."""
+    if not thread_ts_list:
+        return set()
+    with use_session(session) as session:
+        return set(
+            session.scalars(
+                select(SlackThread.thread_ts).where(SlackThread.thread_ts.in_(thread_ts_list))
+            ).all()
+        )
+
+
+def get_thread_cursor(thread_ts: str) -> ThreadCursor | None:
+    """Look up a thread's cursor by its thread_ts."""
+    with get_session() as session:
+        row = session.execute(
+            select(*_CURSOR_COLUMNS).where(SlackThread.thread_ts == thread_ts)
+        ).first()
+        return ThreadCursor(*row) if row is not None else None
+
+
+def get_active_thread_cursors(
+    channel_id: str, now: float | None = None, session: Session | None = None
+) -> list[ThreadCursor]:
+    """Return cursors for the channel's unarchived threads, only those due to be polled if now is given."""
+    query = select(*_CURSOR_COLUMNS).where(
+        SlackThread.channel_id == channel_id, SlackThread.status == "active"
+    )
+    if now is not None:
+        query = query.where(
+            or_(SlackThread.next_poll_at.is_(None), SlackThread.next_poll_at <= now)
+        )
+    with use_session(session) as session:
+        return [ThreadCursor(*row) for row in session.execute(query)]
+
+
+def get_archived_thread_cursors(
+    channel_id: str, session: Session | None = None
+) -> list[ThreadCursor]:
+    """Return cursors for the channel's archived threads."""
+    with use_session(session) as session:
+        return [
+            ThreadCursor(*row)
+            for row in session.execute(
+                select(*_CURSOR_COLUMNS).where(
+                    SlackThread.channel_id == channel_id, SlackThread.status == "archived"
+                )
+            )
+        ]
+
+
+def _set_thread_state(
+    thread_ts: str, status: str, next_poll_at: float | None, session: Session | None
+) -> None:
+    with use_session(session) as session:
+        session.execute(
+            update(SlackThread)
+            .where(SlackThread.thread_ts == thread_ts)
+            .values(status=status, next_poll_at=next_poll_at)
+        )
+
+
+def schedule_thread(thread_ts: str, next_poll_at: float, session: Session | None = None) -> None:
+    """Set when an active thread is next polled."""
+    _set_thread_state(thread_ts, "active", next_poll_at, session)
+
+
+def archive_thread(thread_ts: str, session: Session | None = None) -> None:
+    """Stop polling a thread until it's revived."""
+    _set_thread_state(thread_ts, "archived", None, session)
+
+
+def revive_thread(thread_ts: str, session: Session | None = None) -> None:
+    """Unarchive a thread and make it due on the next poll."""
+    _set_thread_state(thread_ts, "active", None, session)
+
+
+def get_history_rows(thread_ts: str) -> list[SlackThreadMessage]:
+    """Return a thread's stored agent messages in order."""
     with get_session() as session:
         return list(
             session.scalars(
-                select(SlackThread).where(SlackThread.channel_id == channel_id)
+                select(SlackThreadMessage)
+                .where(SlackThreadMessage.thread_ts == thread_ts)
+                .order_by(SlackThreadMessage.seq)
             ).all()
         )
 
 
-def update_message_history(
-    thread_ts: str, message_history_json: str, last_reply_ts: str
+def append_history(
+    thread_ts: str,
+    start_seq: int,
+    encoding: str,
+    messages: list[bytes],
+    last_reply_ts: str,
 ) -> None:
-    """Persist agent message history and the latest reply ts."""
+    """Append agent messages to a thread's history and record the latest reply ts, atomically."""
     with get_session() as session:
-        obj = session.scalars(
-            select(SlackThread).where(SlackThread.thread_ts == thread_ts)
-        ).first()
-        if obj is None:
-            raise ValueError(f"SlackThread with thread_ts={thread_ts!r} not found")
-        obj.message_history_json = message_history_json
-        obj.last_reply_ts = last_reply_ts
+        session.add_all(
+            SlackThreadMessage(thread_ts=thread_ts, seq=start_seq + i, encoding=encoding, data=data)
+            for i, data in enumerate(messages)
+        )
+        session.execute(
+            update(SlackThread)
+            .where(SlackThread.thread_ts == thread_ts)
+            .values(last_reply_ts=last_reply_ts)
+        )
         session.commit()
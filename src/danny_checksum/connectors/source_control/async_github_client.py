@@ -0,0 +1,363 @@
+import asyncio
+import base64
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import quote
+
+import httpx
+
+from danny_checksum.connectors.source_control.blob_cache import MISSING, BlobShaCache, is_commit_sha
+from danny_checksum.connectors.source_control.github_api import (
+    COMMIT_FILES_CONCURRENCY,
+    OBJECT_OID_QUERY,
+    PAGE_SIZE,
+    BranchHead,
+    IssueListing,
+    branch_heads_batches,
+    build_branch_heads_query,
+    cacheable_response,
+    conditional_headers,
+    next_page_url,
+    object_oid_variables,
+    parse_branch_heads,
+    parse_object_oid,
+)
+from danny_checksum.connectors.source_control.response_cache import ResponseCache
+
+GITHUB_API_URL = "https://api.github.com"
+
+
+@dataclass
+class AsyncGitHubClient:
+    """Async counterpart of GitHubClient, built on a pooled keep-alive httpx client.
+
+    Exposes the same methods (as coroutines) so web_server and the pollers
+    can await GitHub without blocking the event loop, and run many requests
+    concurrently over a shared connection pool.
+    """
+
+    http: httpx.AsyncClient
+    cache: ResponseCache = field(default_factory=ResponseCache)
+    blob_cache: BlobShaCache = field(default_factory=BlobShaCache)
+    auth_key: str = ""
+    rate_limiting: tuple[int, int] = (-1, -1)
+    rate_limiting_resettime: int = 0
+
+    @classmethod
+    def from_token(
+        cls, token: str, persistent_cache: bool = False, max_connections: int = 20
+    ) -> "AsyncGitHubClient":
+        http = httpx.AsyncClient(
+            base_url=GITHUB_API_URL,
+            headers={
+                "Authorization": f"Bearer {token}",
+                "Accept": "application/vnd.github+json",
+                "X-GitHub-Api-Version": "2022-11-28",
+            },
+            limits=httpx.Limits(
+                max_connections=max_connections, max_keepalive_connections=max_connections
+            ),
+            timeout=30.0,
+        )
+        return cls(
+            http=http,
+            cache=ResponseCache(persistent=persistent_cache),
+            blob_cache=BlobShaCache(persistent=persistent_cache),
+            auth_key=ResponseCache.fingerprint(token),
+        )
+
+    async def aclose(self) -> None:
+        await self.http.aclose()
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        response = await self.http.request(method, url, **kwargs)
+        headers = response.headers
+        if "x-ratelimit-remaining" in headers:
+            self.rate_limiting = (
+                int(headers["x-ratelimit-remaining"]),
+                int(headers["x-ratelimit-limit"]),
+            )
+            self.rate_limiting_resettime = int(headers["x-ratelimit-reset"])
+        if response.status_code != 304:
+            response.raise_for_status()
+        return response
+
+    async def _get(self, url: str, parameters: dict[str, Any] | None = None) -> Any:
+        """GET a REST resource, revalidating any cached copy with its ETag / Last-Modified."""
+        return (await self._get_page(url, parameters))[0]
+
+    async def _get_page(
+        self, url: str, parameters: dict[str, Any] | None = None
+    ) -> tuple[Any, str | None]:
+        """Like _get, but also return the URL of the next page from the Link header, if any."""
+        key = ResponseCache.make_key(url, parameters, self.auth_key)
+        cached = await self.cache.aget(key)
+        response = await self._request(
+            "GET", url, params=parameters, headers=conditional_headers(cached)
+        )
+        next_url = next_page_url(response.headers.get("link"))
+        if cached is not None and response.status_code == 304:
+            self.cache.record_hit()
+            return cached.body, next_url
+
+        self.cache.record_miss()
+        data = response.json()
+        entry = cacheable_response(response.headers, data)
+        if entry is not None:
+            await self.cache.aput(key, entry)
+        return data, next_url
+
+    async def _post(self, url: str, body: dict[str, Any]) -> Any:
+        return (await self._request("POST", url, json=body)).json()
+
+    async def _graphql(self, body: dict[str, Any]) -> dict[str, Any]:
+        return await self._post("/graphql", body)
+
+    def cache_stats(self) -> dict[str, int]:
+        """Return hit/miss counters for the response and blob caches."""
+        return {
+            **self.cache.stats(),
+            **{f"blob_{k}": v for k, v in self.blob_cache.stats().items()},
+        }
+
+    # --- Issues ---
+
+    async def list_issues(self, repo: str, state: str = "open") -> str:
+        listing = IssueListing.start(repo, state)
+        while not listing.done:
+            listing.add_page(*await self._get_page(listing.url, listing.parameters))
+        return listing.result()
+
+    async def get_issue(self, repo: str, issue_number: int) -> str:
+        issue, comments = await asyncio.gather(
+            self._get(f"/repos/{repo}/issues/{issue_number}"),
+            self._get(f"/repos/{repo}/issues/{issue_number}/comments", {"per_page": 10}),
+        )
+        parts = [
+            f"#{issue['number']} [{issue['state']}] {issue['title']}",
+            f"Author: {issue['user']['login']}",
+            f"Created: {issue['created_at']}",
+            f"Labels: {', '.join(l['name'] for l in issue['labels']) or 'none'}",
+            "",
+            issue["body"] or "(no body)",
+        ]
+        if issue["comments"] > 0:
+            parts.append(f"\n--- Comments ({issue['comments']}) ---")
+            for c in comments[:10]:
+                parts.append(f"\n{c['user']['login']} ({c['created_at']}):\n{c['body']}")
+        return "\n".join(parts)
+
+    async def create_issue(self, repo: str, title: str, body: str = "") -> str:
+        issue = await self._post(f"/repos/{repo}/issues", {"title": title, "body": body})
+        return f"Created issue #{issue['number']}: {issue['html_url']}"
+
+    async def comment_on_issue(self, repo: str, issue_number: int, body: str) -> str:
+        comment = await self._post(
+            f"/repos/{repo}/issues/{issue_number}/comments", {"body": body}
+        )
+        return f"Comment added: {comment['html_url']}"
+
+    # --- Pull Requests ---
+
+    async def list_pull_requests(self, repo: str, state: str = "open") -> str:
+        prs = await self._get(f"/repos/{repo}/pulls", {"state": state, "per_page": 25})
+        lines = [f"#{pr['number']} [{pr['state']}] {pr['title']}" for pr in prs[:25]]
+        return "\n".join(lines) if lines else "No pull requests found."
+
+    async def get_pull_request(self, repo: str, pr_number: int) -> str:
+        pr = await self._get(f"/repos/{repo}/pulls/{pr_number}")
+        parts = [
+            f"#{pr['number']} [{pr['state']}] {pr['title']}",
+            f"Author: {pr['user']['login']}",
+            f"Branch: {pr['head']['ref']} -> {pr['base']['ref']}",
+            f"Created: {pr['created_at']}",
+            f"Mergeable: {pr['mergeable']}",
+            "",
+            pr["body"] or "(no body)",
+        ]
+        return "\n".join(parts)
+
+    async def create_pull_request(
+        self, repo: str, title: str, body: str, head: str, base: str = "main"
+    ) -> str:
+        pr = await self._post(
+            f"/repos/{repo}/pulls", {"title": title, "body": body, "head": head, "base": base}
+        )
+        return f"Created PR #{pr['number']}: {pr['html_url']}"
+
+    async def comment_on_pr(self, repo: str, pr_number: int, body: str) -> str:
+        # PR conversation comments are issue comments
+        return await self.comment_on_issue(repo, pr_number, body)
+
+    # --- Git Data ---
+
+    async def get_branch_sha(self, repo: str, branch: str = "main") -> str:
+        """Return the SHA of the commit at the head of a branch."""
+        return (await self._get(f"/repos/{repo}/branches/{quote(branch)}"))["commit"]["sha"]
+
+    async def get_branch_heads(
+        self, repos: list[str], branch: str = "main", path: str | None = None
+    ) -> dict[str, BranchHead]:
+        """Return the head of a branch for many repos, one GraphQL query per 100 repos.
+
+        See GitHubClient.get_branch_heads; the batches are sent concurrently.
+        """
+        batches = list(branch_heads_batches(repos))
+        responses = await asyncio.gather(
+            *(self._graphql(build_branch_heads_query(batch, branch, path)) for batch in batches)
+        )
+        heads = {}
+        for batch, data in zip(batches, responses):
+            batch_heads = parse_branch_heads(batch, data, path)
+            if path:
+                for repo, head in batch_heads.items():
+                    await self.blob_cache.aput(repo, head.sha, path, head.blob_sha)
+            heads.update(batch_heads)
+        return heads
+
+    async def get_file_blob_sha(self, repo: str, path: str, ref: str = "main") -> str | None:
+        """Return the blob SHA of a file at a given ref, or None if the file doesn't exist."""
+        immutable = is_commit_sha(ref)
+        if immutable:
+            cached = await self.blob_cache.aget(repo, ref, path)
+            if cached is not MISSING:
+                return cached
+
+        data = await self._graphql(
+            {"query": OBJECT_OID_QUERY, "variables": object_oid_variables(repo, ref, path)}
+        )
+        blob_sha = parse_object_oid(repo, data)
+
+        if immutable:
+            await self.blob_cache.aput(repo, ref, path, blob_sha)
+        return blob_sha
+
+    async def is_behind(self, repo: str, base_sha: str, head_sha: str) -> bool:
+        """Return True if head_sha is an ancestor of base_sha (base_sha already contains it)."""
+        # Same parameters as commits_touching's first page, so the two share a cache entry
+        compare = await self._get(
+            f"/repos/{repo}/compare/{base_sha}...{head_sha}", {"per_page": PAGE_SIZE}
+        )
+        return compare["status"] == "behind"
+
+    async def commits_touching(
+        self, repo: str, base_sha: str, head_sha: str, path: str
+    ) -> list[str]:
+        """Return the commits in base_sha..head_sha that touched path, oldest first.
+
+        Both listings are paged through: the compare in full, and the path's
+        history until it's older than the range. Raises if the compare comes
+        back incomplete, so the caller never advances past commits it didn't
+        see. Repeats are served from the ETag cache.
+        """
+        in_range: dict[str, str] = {}  # sha -> committer date
+        url: str | None = f"/repos/{repo}/compare/{base_sha}...{head_sha}"
+        parameters: dict[str, Any] | None = {"per_page": PAGE_SIZE}
+        total = 0
+        while url is not None:
+            compare, url = await self._get_page(url, parameters)
+            parameters = None
+            total = compare["total_commits"]
+            for c in compare["commits"]:
+                in_range[c["sha"]] = c["commit"]["committer"]["date"]
+        if len(in_range) < total:
+            raise RuntimeError(
+                f"Compare {base_sha}...{head_sha} of {repo} listed {len(in_range)} of {total} commits"
+            )
+        if not in_range:
+            return []
+
+        # ISO 8601 UTC timestamps sort chronologically as strings
+        oldest = min(in_range.values())
+        touched = []
+        url = f"/repos/{repo}/commits"
+        parameters = {"sha": head_sha, "path": path, "per_page": PAGE_SIZE}
+        while url is not None:
+            commits, url = await self._get_page(url, parameters)
+            parameters = None
+            touched += [c["sha"] for c in commits if c["sha"] in in_range]
+            if commits and commits[-1]["sha"] not in in_range:
+                if commits[-1]["commit"]["committer"]["date"] < oldest:
+                    break
+        return list(reversed(touched))
+
+    # --- Repo Content ---
+
+    async def get_file_content(self, repo: str, path: str, ref: str = "main") -> str:
+        content = await self._get(f"/repos/{repo}/contents/{quote(path)}", {"ref": ref})
+        if isinstance(content, list):
+            return "Error: path is a directory, not a file. Use list_directory instead."
+        return base64.b64decode(content["content"]).decode()
+
+    async def list_directory(self, repo: str, path: str = "") -> str:
+        contents = await self._get(f"/repos/{repo}/contents/{quote(path)}")
+        if not isinstance(contents, list):
+            return f"{contents['path']} (file, {contents['size']} bytes)"
+        lines = []
+        for item in contents:
+            kind = "dir" if item["type"] == "dir" else "file"
+            lines.append(f"[{kind}] {item['path']}")
+        return "\n".join(lines) if lines else "Empty directory."
+
+    async def create_or_update_file(
+        self, repo: str, path: str, content: str, message: str, branch: str = "main"
+    ) -> str:
+        url = f"/repos/{repo}/contents/{quote(path)}"
+        body = {
+            "message": message,
+            "content": base64.b64encode(content.encode()).decode(),
+            "branch": branch,
+        }
+        try:
+            existing = await self._get(url, {"ref": branch})
+        except httpx.HTTPStatusError as e:
+            if e.response.status_code != 404:
+                raise
+            existing = None
+
+        if isinstance(existing, list):
+            return "Error: path is a directory."
+        if existing is not None:
+            body["sha"] = existing["sha"]
+        await self._request("PUT", url, json=body)
+        verb = "Updated" if existing is not None else "Created"
+        return f"{verb} {path} on {branch}."
+
+    async def commit_files(
+        self, repo: str, branch: str, files: dict[str, str], message: str
+    ) -> str:
+        """Create or update many files in a single commit via the Git Data API.
+
+        Blobs are uploaded concurrently, then one tree and one commit are
+        created and the branch ref is moved to it.
+        """
+        semaphore = asyncio.Semaphore(COMMIT_FILES_CONCURRENCY)
+
+        async def _create_blob(content: str) -> str:
+            async with semaphore:
+                blob = await self._post(
+                    f"/repos/{repo}/git/blobs",
+                    {"content": base64.b64encode(content.encode()).decode(), "encoding": "base64"},
+                )
+                return blob["sha"]
+
+        ref_response, *blob_shas = await asyncio.gather(
+            self._request("GET", f"/repos/{repo}/git/ref/heads/{quote(branch)}"),
+            *(_create_blob(content) for content in files.values()),
+        )
+        base_sha = ref_response.json()["object"]["sha"]
+        base_commit = await self._get(f"/repos/{repo}/git/commits/{base_sha}")
+        tree = await self._post(f"/repos/{repo}/git/trees", {
+            "base_tree": base_commit["tree"]["sha"],
+            "tree": [
+                {"path": path, "mode": "100644", "type": "blob", "sha": sha}
+                for path, sha in zip(files, blob_shas)
+            ],
+        })
+        commit = await self._post(f"/repos/{repo}/git/commits", {
+            "message": message, "tree": tree["sha"], "parents": [base_sha],
+        })
+        await self._request(
+            "PATCH", f"/repos/{repo}/git/refs/heads/{quote(branch)}", json={"sha": commit["sha"]}
+        )
+        return f"Committed {len(files)} file(s) to {branch}: {commit['sha']}"
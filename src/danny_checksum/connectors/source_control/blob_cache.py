@@ -0,0 +1,108 @@
+import asyncio
+import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+
+from danny_checksum.connectors.database import git_blob_cache_dao
+from danny_checksum.connectors.source_control.response_cache import PRUNE_EVERY
+
+_COMMIT_SHA = re.compile(r"^[0-9a-f]{40}$")
+
+# Distinguishes "not cached" from a cached "path doesn't exist"
+MISSING = object()
+
+
+def is_commit_sha(ref: str) -> bool:
+    """Return True if ref is a full commit SHA (and so its content can never change)."""
+    return bool(_COMMIT_SHA.match(ref))
+
+
+@dataclass
+class BlobShaCache:
+    """LRU of (repo, commit_sha, path) -> blob SHA.
+
+    Content at a commit SHA is immutable, so entries never need revalidating.
+    With persistent=True lookups are also written to the git_blob_cache table,
+    which is pruned to the max_persisted most recent entries.
+    """
+
+    max_entries: int = 4096
+    persistent: bool = False
+    max_persisted: int = 65536
+    hits: int = 0
+    misses: int = 0
+    _entries: OrderedDict[tuple[str, str, str], str | None] = field(
+        default_factory=OrderedDict, repr=False
+    )
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _writes: int = field(default=0, repr=False)
+
+    def get(self, repo: str, commit_sha: str, path: str) -> object:
+        """Return the cached blob SHA (possibly None), or MISSING if not cached."""
+        key = (repo, commit_sha, path)
+        blob_sha = self._recall(key)
+        if blob_sha is MISSING and self.persistent:
+            blob_sha = self._load(key)
+        self._count(blob_sha)
+        return blob_sha
+
+    async def aget(self, repo: str, commit_sha: str, path: str) -> object:
+        """Like get, but reads the git_blob_cache table in a worker thread."""
+        key = (repo, commit_sha, path)
+        blob_sha = self._recall(key)
+        if blob_sha is MISSING and self.persistent:
+            blob_sha = await asyncio.to_thread(self._load, key)
+        self._count(blob_sha)
+        return blob_sha
+
+    def put(self, repo: str, commit_sha: str, path: str, blob_sha: str | None) -> None:
+        self._remember((repo, commit_sha, path), blob_sha)
+        if self.persistent:
+            self._persist((repo, commit_sha, path), blob_sha)
+
+    async def aput(self, repo: str, commit_sha: str, path: str, blob_sha: str | None) -> None:
+        """Like put, but writes the git_blob_cache table in a worker thread."""
+        self._remember((repo, commit_sha, path), blob_sha)
+        if self.persistent:
+            await asyncio.to_thread(self._persist, (repo, commit_sha, path), blob_sha)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def _recall(self, key: tuple[str, str, str]) -> object:
+        with self._lock:
+            if key not in self._entries:
+                return MISSING
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def _load(self, key: tuple[str, str, str]) -> object:
+        row = git_blob_cache_dao.get_entry(*key)
+        if row is None:
+            return MISSING
+        self._remember(key, row.blob_sha)
+        return row.blob_sha
+
+    def _persist(self, key: tuple[str, str, str], blob_sha: str | None) -> None:
+        git_blob_cache_dao.save_entry(*key, blob_sha)
+        with self._lock:
+            self._writes += 1
+            should_prune = self._writes % PRUNE_EVERY == 0
+        if should_prune:
+            git_blob_cache_dao.prune(self.max_persisted)
+
+    def _count(self, blob_sha: object) -> None:
+        with self._lock:
+            if blob_sha is MISSING:
+                self.misses += 1
+            else:
+                self.hits += 1
+
+    def _remember(self, key: tuple[str, str, str], blob_sha: str | None) -> None:
+        with self._lock:
+            self._entries[key] = blob_sha
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
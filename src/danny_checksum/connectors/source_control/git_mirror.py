@@ -0,0 +1,154 @@
+import asyncio
+import base64
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from danny_checksum.connectors.source_control.github_api import BranchHead
+
+PROJECT_ROOT = Path(__file__).resolve().parents[4]
+DEFAULT_MIRROR_DIR = PROJECT_ROOT / "git_mirrors"
+
+# How many repos to fetch at once
+_FETCH_CONCURRENCY = 4
+
+
+@dataclass
+class GitMirror:
+    """Local bare, blobless mirrors of customer repos, kept up to date with `git fetch`.
+
+    Provides the parts of the AsyncGitHubClient surface the git poller needs
+    (get_branch_heads, get_branch_sha, get_file_blob_sha, is_behind, commits_touching)
+    from local git plumbing, so change detection costs no API rate limit.
+    Only trees and commits are fetched; that's all rev-parse, log and
+    merge-base need.
+    """
+
+    token: str
+    root: Path = DEFAULT_MIRROR_DIR
+    # Local git has no rate limit; these mirror AsyncGitHubClient for the scheduler
+    rate_limiting: tuple[int, int] = (-1, -1)
+    rate_limiting_resettime: int = 0
+    # One lock per mirror, so concurrent fetches never collide on its ref locks
+    _fetch_locks: dict[str, asyncio.Lock] = field(default_factory=dict, repr=False)
+
+    def path_for(self, repo: str) -> Path:
+        return self.root / f"{repo.replace('/', '__')}.git"
+
+    async def _git(self, repo: str, *args: str, check: bool = True) -> tuple[int, str]:
+        # Pass the token through the environment so it never shows up in argv or .git/config
+        auth = base64.b64encode(f"x-access-token:{self.token}".encode()).decode()
+        env = {
+            **os.environ,
+            "GIT_TERMINAL_PROMPT": "0",
+            "GIT_CONFIG_COUNT": "1",
+            "GIT_CONFIG_KEY_0": "http.https://github.com/.extraheader",
+            "GIT_CONFIG_VALUE_0": f"AUTHORIZATION: basic {auth}",
+        }
+        proc = await asyncio.create_subprocess_exec(
+            "git", "-C", str(self.path_for(repo)), *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+        )
+        stdout, stderr = await proc.communicate()
+        if check and proc.returncode != 0:
+            raise RuntimeError(f"git {' '.join(args)} failed for {repo}: {stderr.decode().strip()}")
+        return proc.returncode, stdout.decode().strip()
+
+    async def sync(self, repo: str, branch: str = "main") -> None:
+        """Create the mirror if needed, then incrementally fetch the branch."""
+        async with self._fetch_locks.setdefault(repo, asyncio.Lock()):
+            await self._fetch(repo, branch)
+
+    async def _fetch(self, repo: str, branch: str) -> None:
+        # Callers hold the repo's fetch lock
+        path = self.path_for(repo)
+        if not path.exists():
+            path.mkdir(parents=True)
+            await self._git(repo, "init", "--bare", "--quiet")
+            await self._git(repo, "remote", "add", "origin", f"https://github.com/{repo}.git")
+        await self._git(
+            repo, "fetch", "--quiet", "--filter=blob:none", "--no-tags", "origin",
+            f"+refs/heads/{branch}:refs/heads/{branch}",
+        )
+
+    async def _ensure_commit(self, repo: str, sha: str, branch: str = "main") -> None:
+        """Fetch if sha isn't in the mirror yet (e.g. a push we heard about by webhook).
+
+        Raises if it's still unknown afterwards, rather than letting git
+        report it as a missing path or an empty range.
+        """
+        if await self._has_commit(repo, sha):
+            return
+        async with self._fetch_locks.setdefault(repo, asyncio.Lock()):
+            # A fetch we waited on may already have brought it in
+            if not await self._has_commit(repo, sha):
+                await self._fetch(repo, branch)
+        if not await self._has_commit(repo, sha):
+            raise RuntimeError(f"Commit {sha} not found in {repo} after fetching {branch}")
+
+    async def _has_commit(self, repo: str, sha: str) -> bool:
+        if not self.path_for(repo).exists():
+            return False
+        returncode, _ = await self._git(repo, "cat-file", "-e", f"{sha}^{{commit}}", check=False)
+        return returncode == 0
+
+    async def _rev_parse_branch(self, repo: str, branch: str) -> str:
+        _, sha = await self._git(repo, "rev-parse", f"refs/heads/{branch}")
+        return sha
+
+    async def get_branch_sha(self, repo: str, branch: str = "main") -> str:
+        """Fetch the branch, then return the SHA of its head."""
+        await self.sync(repo, branch)
+        return await self._rev_parse_branch(repo, branch)
+
+    async def get_branch_heads(
+        self, repos: list[str], branch: str = "main", path: str | None = None
+    ) -> dict[str, BranchHead]:
+        """Fetch each repo's mirror and return its branch head. Repos that fail to fetch are left out."""
+        semaphore = asyncio.Semaphore(_FETCH_CONCURRENCY)
+
+        async def _head(repo: str) -> BranchHead | None:
+            async with semaphore:
+                try:
+                    sha = await self.get_branch_sha(repo, branch)
+                except RuntimeError as e:
+                    print(f"Git mirror: {e}")
+                    return None
+                blob_sha = await self.get_file_blob_sha(repo, path, sha) if path else None
+                return BranchHead(sha=sha, blob_sha=blob_sha)
+
+        results = await asyncio.gather(*(_head(repo) for repo in repos))
+        return {repo: head for repo, head in zip(repos, results) if head is not None}
+
+    async def get_file_blob_sha(self, repo: str, path: str, ref: str = "main") -> str | None:
+        """Return the blob SHA of a file at a given commit, or None if the file doesn't exist.
+
+        Raises if the commit can't be found, even after fetching.
+        """
+        await self._ensure_commit(repo, ref)
+        returncode, sha = await self._git(
+            repo, "rev-parse", "--verify", "--quiet", f"{ref}:{path}", check=False
+        )
+        return sha if returncode == 0 else None
+
+    async def is_behind(self, repo: str, base_sha: str, head_sha: str) -> bool:
+        """Return True if head_sha is an ancestor of base_sha (base_sha already contains it)."""
+        if head_sha == base_sha:
+            return False
+        await self._ensure_commit(repo, head_sha)
+        returncode, _ = await self._git(
+            repo, "merge-base", "--is-ancestor", head_sha, base_sha, check=False
+        )
+        return returncode == 0
+
+    async def commits_touching(
+        self, repo: str, base_sha: str, head_sha: str, path: str
+    ) -> list[str]:
+        """Return the commits in base_sha..head_sha that touched path, oldest first."""
+        await self._ensure_commit(repo, head_sha)
+        _, output = await self._git(
+            repo, "log", "--format=%H", "--reverse", f"{base_sha}..{head_sha}", "--", path
+        )
+        return output.splitlines()
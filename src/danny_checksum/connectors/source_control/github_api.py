@@ -0,0 +1,168 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Iterator
+
+from danny_checksum.connectors.source_control.response_cache import CachedResponse
+
+# Request building and response parsing shared by GitHubClient and
+# AsyncGitHubClient; the clients only do the I/O.
+
+OBJECT_OID_QUERY = """
+query($owner: String!, $name: String!, $expression: String!) {
+  repository(owner: $owner, name: $name) {
+    object(expression: $expression) { oid }
+  }
+}
+"""
+
+# Largest page GitHub's list endpoints return
+PAGE_SIZE = 100
+
+# How many blobs commit_files uploads at once
+COMMIT_FILES_CONCURRENCY = 8
+
+# How many issues list_issues returns
+LIST_ISSUES_LIMIT = 25
+
+# GitHub caps the number of nodes per GraphQL query; 100 repositories is well within it
+BRANCH_HEADS_BATCH_SIZE = 100
+
+
+_NEXT_LINK = re.compile(r'<([^>]+)>;\s*rel="next"')
+
+
+def next_page_url(link: str | None) -> str | None:
+    """Return the rel="next" URL from a Link header, or None on the last page."""
+    match = _NEXT_LINK.search(link or "")
+    return match.group(1) if match else None
+
+
+# --- Conditional requests ---
+
+
+def conditional_headers(cached: CachedResponse | None) -> dict[str, str]:
+    """Return the headers revalidating a cached response with its ETag / Last-Modified."""
+    headers = {}
+    if cached is not None:
+        if cached.etag:
+            headers["If-None-Match"] = cached.etag
+        if cached.last_modified:
+            headers["If-Modified-Since"] = cached.last_modified
+    return headers
+
+
+def cacheable_response(headers: Any, data: Any) -> CachedResponse | None:
+    """Return the cache entry for a fresh response, or None if it has no validators."""
+    etag = headers.get("etag")
+    last_modified = headers.get("last-modified")
+    if etag or last_modified:
+        return CachedResponse(etag, last_modified, data)
+    return None
+
+
+# --- Issues ---
+
+
+@dataclass
+class IssueListing:
+    """Pages through a repo's issues until LIST_ISSUES_LIMIT are found.
+
+    The issues endpoint returns PRs too, so one page may not be enough.
+    """
+
+    url: str | None
+    parameters: dict[str, Any] | None
+    lines: list[str] = field(default_factory=list)
+
+    @classmethod
+    def start(cls, repo: str, state: str) -> "IssueListing":
+        return cls(url=f"/repos/{repo}/issues", parameters={"state": state, "per_page": PAGE_SIZE})
+
+    @property
+    def done(self) -> bool:
+        return self.url is None or len(self.lines) >= LIST_ISSUES_LIMIT
+
+    def add_page(self, issues: list[dict], next_url: str | None) -> None:
+        self.url = next_url
+        self.parameters = None  # the next page's URL carries its own query
+        for issue in issues:
+            if len(self.lines) >= LIST_ISSUES_LIMIT:
+                break
+            if issue.get("pull_request") is None:
+                self.lines.append(f"#{issue['number']} [{issue['state']}] {issue['title']}")
+
+    def result(self) -> str:
+        return "\n".join(self.lines) if self.lines else "No issues found."
+
+
+# --- Git Data ---
+
+
+@dataclass
+class BranchHead:
+    sha: str
+    blob_sha: str | None = None
+
+
+def branch_heads_batches(repos: list[str]) -> Iterator[list[str]]:
+    """Split repos into batches small enough for one branch-heads query each."""
+    for start in range(0, len(repos), BRANCH_HEADS_BATCH_SIZE):
+        yield repos[start:start + BRANCH_HEADS_BATCH_SIZE]
+
+
+def build_branch_heads_query(
+    repos: list[str], branch: str, path: str | None
+) -> dict[str, Any]:
+    """Build a GraphQL request body fetching the branch head (and optionally a file's blob) of each repo."""
+    params = ["$ref: String!"] + (["$path: String!"] if path else [])
+    variables: dict[str, Any] = {"ref": f"refs/heads/{branch}"}
+    if path:
+        variables["path"] = path
+    # Reading the file off the same commit keeps sha and blob_sha consistent
+    file_field = " ... on Commit { file(path: $path) { oid } }" if path else ""
+    fields = []
+    for i, repo in enumerate(repos):
+        owner, name = repo.split("/", 1)
+        params += [f"$o{i}: String!", f"$n{i}: String!"]
+        variables[f"o{i}"] = owner
+        variables[f"n{i}"] = name
+        fields.append(
+            f"r{i}: repository(owner: $o{i}, name: $n{i}) "
+            f"{{ ref(qualifiedName: $ref) {{ target {{ oid{file_field} }} }} }}"
+        )
+    query = f"query({', '.join(params)}) {{ {' '.join(fields)} }}"
+    return {"query": query, "variables": variables}
+
+
+def parse_branch_heads(
+    repos: list[str], data: dict[str, Any], path: str | None
+) -> dict[str, BranchHead]:
+    """Parse the response to build_branch_heads_query, dropping repos or branches that weren't found."""
+    results = data.get("data") or {}
+    heads = {}
+    for i, repo in enumerate(repos):
+        node = results.get(f"r{i}")
+        if node is None or node["ref"] is None:
+            continue
+        target = node["ref"]["target"]
+        head = BranchHead(sha=target["oid"])
+        if path:
+            file = target.get("file")
+            head.blob_sha = file["oid"] if file is not None else None
+        heads[repo] = head
+    return heads
+
+
+def object_oid_variables(repo: str, ref: str, path: str) -> dict[str, str]:
+    """Return the OBJECT_OID_QUERY variables looking up path at ref."""
+    owner, name = repo.split("/", 1)
+    return {"owner": owner, "name": name, "expression": f"{ref}:{path}"}
+
+
+def parse_object_oid(repo: str, data: dict[str, Any]) -> str | None:
+    """Return the blob SHA from an OBJECT_OID_QUERY response, or None if the path doesn't exist."""
+    repository = data["data"]["repository"]
+    if repository is None:
+        raise ValueError(f"Repository {repo!r} not found")
+    obj = repository["object"]
+    return obj["oid"] if obj is not None else None
@@ -1,32 +1,99 @@
-from dataclasses import dataclass
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import quote
 
-from github import Auth, Github
+from github import Auth, Github, InputGitTreeElement, UnknownObjectException
+from github.Repository import Repository
+
+from danny_checksum.connectors.source_control.blob_cache import MISSING, BlobShaCache, is_commit_sha
+from danny_checksum.connectors.source_control.github_api import (
+    COMMIT_FILES_CONCURRENCY,
+    OBJECT_OID_QUERY,
+    BranchHead,
+    IssueListing,
+    branch_heads_batches,
+    build_branch_heads_query,
+    cacheable_response,
+    conditional_headers,
+    next_page_url,
+    object_oid_variables,
+    parse_branch_heads,
+    parse_object_oid,
+)
+from danny_checksum.connectors.source_control.response_cache import ResponseCache
 
 
 @dataclass
 class GitHubClient:
     github: Github
+    cache: ResponseCache = field(default_factory=ResponseCache)
+    blob_cache: BlobShaCache = field(default_factory=BlobShaCache)
+    auth_key: str = ""
 
     @classmethod
-    def from_token(cls, token: str) -> "GitHubClient":
-        return cls(github=Github(auth=Auth.Token(token)))
+    def from_token(
+        cls, token: str, persistent_cache: bool = False, pool_size: int | None = None
+    ) -> "GitHubClient":
+        return cls(
+            github=Github(auth=Auth.Token(token), pool_size=pool_size),
+            cache=ResponseCache(persistent=persistent_cache),
+            blob_cache=BlobShaCache(persistent=persistent_cache),
+            auth_key=ResponseCache.fingerprint(token),
+        )
+
+    def _repo(self, repo: str) -> Repository:
+        """Return a lazy Repository handle.
+
+        Unlike Github.get_repo, this doesn't GET the repo's metadata up front;
+        objects reached through it (issues, PRs) are lazy too and only fetch
+        themselves when an attribute is read.
+        """
+        return Repository(self.github.requester.withLazy(True), url=f"/repos/{repo}")
+
+    def _get(self, url: str, parameters: dict[str, Any] | None = None) -> Any:
+        """GET a REST resource, revalidating any cached copy with its ETag / Last-Modified."""
+        return self._get_page(url, parameters)[0]
+
+    def _get_page(
+        self, url: str, parameters: dict[str, Any] | None = None
+    ) -> tuple[Any, str | None]:
+        """Like _get, but also return the URL of the next page from the Link header, if any."""
+        key = ResponseCache.make_key(url, parameters, self.auth_key)
+        cached = self.cache.get(key)
+        response_headers, data = self.github.requester.requestJsonAndCheck(
+            "GET", url, parameters=parameters, headers=conditional_headers(cached)
+        )
+        next_url = next_page_url(response_headers.get("link"))
+        # A 304 comes back with an empty body
+        if cached is not None and data is None:
+            self.cache.record_hit()
+            return cached.body, next_url
+
+        self.cache.record_miss()
+        entry = cacheable_response(response_headers, data)
+        if entry is not None:
+            self.cache.put(key, entry)
+        return data, next_url
+
+    def cache_stats(self) -> dict[str, int]:
+        """Return hit/miss counters for the response and blob caches."""
+        return {
+            **self.cache.stats(),
+            **{f"blob_{k}": v for k, v in self.blob_cache.stats().items()},
+        }
 
     # --- Issues ---
 
     def list_issues(self, repo: str, state: str = "open") -> str:
-        issues = self.github.get_repo(repo).get_issues(state=state)
-        lines = []
-        count = 0
-        for issue in issues:
-            if count >= 25:
-                break
-            if issue.pull_request is None:
-                lines.append(f"#{issue.number} [{issue.state}] {issue.title}")
-                count += 1
-        return "\n".join(lines) if lines else "No issues found."
+        listing = IssueListing.start(repo, state)
+        while not listing.done:
+            listing.add_page(*self._get_page(listing.url, listing.parameters))
+        return listing.result()
 
     def get_issue(self, repo: str, issue_number: int) -> str:
-        issue = self.github.get_repo(repo).get_issue(issue_number)
+        issue = self._repo(repo).get_issue(issue_number)
         parts = [
             f"#{issue.number} [{issue.state}] {issue.title}",
             f"Author: {issue.user.login}",
@@ -45,27 +112,27 @@ class GitHubClient:
         return "\n".join(parts)
 
     def create_issue(self, repo: str, title: str, body: str = "") -> str:
-        issue = self.github.get_repo(repo).create_issue(title=title, body=body)
+        issue = self._repo(repo).create_issue(title=title, body=body)
         return f"Created issue #{issue.number}: {issue.html_url}"
 
     def comment_on_issue(self, repo: str, issue_number: int, body: str) -> str:
-        issue = self.github.get_repo(repo).get_issue(issue_number)
+        issue = self._repo(repo).get_issue(issue_number)
         comment = issue.create_comment(body=body)
         return f"Comment added: {comment.html_url}"
 
     # --- Pull Requests ---
 
     def list_pull_requests(self, repo: str, state: str = "open") -> str:
-        prs = self.github.get_repo(repo).get_pulls(state=state)
+        prs = self._get(f"/repos/{repo}/pulls", {"state": state, "per_page": 25})
         lines = []
         for i, pr in enumerate(prs):
             if i >= 25:
                 break
-            lines.append(f"#{pr.number} [{pr.state}] {pr.title}")
+            lines.append(f"#{pr['number']} [{pr['state']}] {pr['title']}")
         return "\n".join(lines) if lines else "No pull requests found."
 
     def get_pull_request(self, repo: str, pr_number: int) -> str:
-        pr = self.github.get_repo(repo).get_pull(pr_number)
+        pr = self._repo(repo).get_pull(pr_number)
         parts = [
             f"#{pr.number} [{pr.state}] {pr.title}",
             f"Author: {pr.user.login}",
@@ -80,54 +147,119 @@ class GitHubClient:
     def create_pull_request(
         self, repo: str, title: str, body: str, head: str, base: str = "main"
     ) -> str:
-        pr = self.github.get_repo(repo).create_pull(
+        pr = self._repo(repo).create_pull(
             title=title, body=body, head=head, base=base
         )
         return f"Created PR #{pr.number}: {pr.html_url}"
 
     def comment_on_pr(self, repo: str, pr_number: int, body: str) -> str:
-        pr = self.github.get_repo(repo).get_pull(pr_number)
+        pr = self._repo(repo).get_pull(pr_number)
         comment = pr.create_issue_comment(body=body)
         return f"Comment added: {comment.html_url}"
 
     # --- Git Data ---
 
+    def get_branch_sha(self, repo: str, branch: str = "main") -> str:
+        """Return the SHA of the commit at the head of a branch."""
+        return self._get(f"/repos/{repo}/branches/{quote(branch)}")["commit"]["sha"]
+
+    def get_branch_heads(
+        self, repos: list[str], branch: str = "main", path: str | None = None
+    ) -> dict[str, BranchHead]:
+        """Return the head of a branch for many repos using one GraphQL query per 100 repos.
+
+        If path is given, the blob SHA of that path at each head is fetched too
+        and seeded into the blob cache. Repos that don't exist, or don't have
+        the branch, are left out of the result.
+        """
+        heads = {}
+        for batch in branch_heads_batches(repos):
+            # Not requester.graphql_query: that raises if any one repo in the batch is missing
+            _, data = self.github.requester.requestJsonAndCheck(
+                "POST",
+                self.github.requester.graphql_url,
+                input=build_branch_heads_query(batch, branch, path),
+            )
+            batch_heads = parse_branch_heads(batch, data, path)
+            if path:
+                for repo, head in batch_heads.items():
+                    self.blob_cache.put(repo, head.sha, path, head.blob_sha)
+            heads.update(batch_heads)
+        return heads
+
     def get_file_blob_sha(self, repo: str, path: str, ref: str = "main") -> str | None:
-        """Return the blob SHA of a file at a given ref, or None if the file doesn't exist."""
-        tree = self.github.get_repo(repo).get_git_tree(ref)
-        for entry in tree.tree:
-            if entry.path == path:
-                return entry.sha
-        return None
+        """Return the blob SHA of a file at a given ref, or None if the file doesn't exist.
+
+        Resolves just the requested path rather than downloading the root tree.
+        Lookups at a full commit SHA are cached, since they can never change.
+        """
+        immutable = is_commit_sha(ref)
+        if immutable:
+            cached = self.blob_cache.get(repo, ref, path)
+            if cached is not MISSING:
+                return cached
+
+        _, data = self.github.requester.graphql_query(
+            OBJECT_OID_QUERY, object_oid_variables(repo, ref, path)
+        )
+        blob_sha = parse_object_oid(repo, data)
+
+        if immutable:
+            self.blob_cache.put(repo, ref, path, blob_sha)
+        return blob_sha
 
     # --- Repo Content ---
 
     def get_file_content(self, repo: str, path: str, ref: str = "main") -> str:
-        content = self.github.get_repo(repo).get_contents(path, ref=ref)
+        content = self._get(f"/repos/{repo}/contents/{quote(path)}", {"ref": ref})
         if isinstance(content, list):
             return "Error: path is a directory, not a file. Use list_directory instead."
-        return content.decoded_content.decode()
+        return base64.b64decode(content["content"]).decode()
 
     def list_directory(self, repo: str, path: str = "") -> str:
-        contents = self.github.get_repo(repo).get_contents(path)
+        contents = self._get(f"/repos/{repo}/contents/{quote(path)}")
         if not isinstance(contents, list):
-            return f"{contents.path} (file, {contents.size} bytes)"
+            return f"{contents['path']} (file, {contents['size']} bytes)"
         lines = []
         for item in contents:
-            kind = "dir" if item.type == "dir" else "file"
-            lines.append(f"[{kind}] {item.path}")
+            kind = "dir" if item["type"] == "dir" else "file"
+            lines.append(f"[{kind}] {item['path']}")
         return "\n".join(lines) if lines else "Empty directory."
 
     def create_or_update_file(
         self, repo: str, path: str, content: str, message: str, branch: str = "main"
     ) -> str:
-        r = self.github.get_repo(repo)
+        r = self._repo(repo)
         try:
             existing = r.get_contents(path, ref=branch)
-            if isinstance(existing, list):
-                return "Error: path is a directory."
-            r.update_file(path, message, content, existing.sha, branch=branch)
-            return f"Updated {path} on {branch}."
-        except Exception:
+        except UnknownObjectException:
             r.create_file(path, message, content, branch=branch)
             return f"Created {path} on {branch}."
+        if isinstance(existing, list):
+            return "Error: path is a directory."
+        r.update_file(path, message, content, existing.sha, branch=branch)
+        return f"Updated {path} on {branch}."
+
+    def commit_files(self, repo: str, branch: str, files: dict[str, str], message: str) -> str:
+        """Create or update many files in a single commit via the Git Data API.
+
+        Blobs are uploaded concurrently, then one tree and one commit are
+        created and the branch ref is moved to it.
+        """
+        r = self._repo(repo)
+        ref = r.get_git_ref(f"heads/{branch}")
+        base_commit = r.get_git_commit(ref.object.sha)
+        with ThreadPoolExecutor(max_workers=COMMIT_FILES_CONCURRENCY) as pool:
+            blobs = list(
+                pool.map(lambda content: r.create_git_blob(content, "utf-8"), files.values())
+            )
+        tree = r.create_git_tree(
+            [
+                InputGitTreeElement(path, "100644", "blob", sha=blob.sha)
+                for path, blob in zip(files, blobs)
+            ],
+            base_tree=base_commit.tree,
+        )
+        commit = r.create_git_commit(message, tree, [base_commit])
+        ref.edit(commit.sha)
+        return f"Committed {len(files)} file(s) to {branch}: {commit.sha}"
@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from danny_checksum.connectors.database import github_cache_dao
+
+# Prune the on-disk cache once every this many writes rather than on each one
+PRUNE_EVERY = 64
+
+
+@dataclass
+class CachedResponse:
+    etag: str | None
+    last_modified: str | None
+    body: Any
+
+
+@dataclass
+class ResponseCache:
+    """Bounded LRU of GitHub GET responses for conditional (ETag) revalidation.
+
+    GitHub doesn't count 304 Not Modified against the rate limit, so serving
+    unchanged resources from here makes idle polls close to free. With
+    persistent=True entries are written through to the github_response_cache
+    table so validators survive restarts.
+    """
+
+    max_entries: int = 1024
+    persistent: bool = False
+    hits: int = 0
+    misses: int = 0
+    _entries: OrderedDict[str, CachedResponse] = field(default_factory=OrderedDict, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+    _writes: int = field(default=0, repr=False)
+
+    @staticmethod
+    def fingerprint(token: str) -> str:
+        """Return a short, non-reversible identifier for an auth token."""
+        return hashlib.sha256(token.encode()).hexdigest()[:16]
+
+    @staticmethod
+    def make_key(url: str, parameters: dict[str, Any] | None, auth_key: str) -> str:
+        query = "&".join(f"{k}={v}" for k, v in sorted((parameters or {}).items()))
+        return f"{auth_key}:{url}?{query}"
+
+    def get(self, key: str) -> CachedResponse | None:
+        entry = self._recall(key)
+        if entry is None and self.persistent:
+            entry = self._load(key)
+        return entry
+
+    async def aget(self, key: str) -> CachedResponse | None:
+        """Like get, but reads the github_response_cache table in a worker thread."""
+        entry = self._recall(key)
+        if entry is None and self.persistent:
+            entry = await asyncio.to_thread(self._load, key)
+        return entry
+
+    def put(self, key: str, entry: CachedResponse) -> None:
+        self._remember(key, entry)
+        if self.persistent:
+            self._persist(key, entry)
+
+    async def aput(self, key: str, entry: CachedResponse) -> None:
+        """Like put, but writes the github_response_cache table in a worker thread."""
+        self._remember(key, entry)
+        if self.persistent:
+            await asyncio.to_thread(self._persist, key, entry)
+
+    def record_hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def _recall(self, key: str) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def _load(self, key: str) -> CachedResponse | None:
+        row = github_cache_dao.get_response(key)
+        if row is None:
+            return None
+        entry = CachedResponse(row.etag, row.last_modified, json.loads(row.body_json))
+        self._remember(key, entry)
+        return entry
+
+    def _persist(self, key: str, entry: CachedResponse) -> None:
+        github_cache_dao.save_response(
+            key, entry.etag, entry.last_modified, json.dumps(entry.body)
+        )
+        with self._lock:
+            self._writes += 1
+            should_prune = self._writes % PRUNE_EVERY == 0
+        if should_prune:
+            github_cache_dao.prune(self.max_entries)
+
+    def _remember(self, key: str, entry: CachedResponse) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
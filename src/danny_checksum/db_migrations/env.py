@@ -1,9 +1,10 @@
 from logging.config import fileConfig
-from pathlib import Path
 
 from alembic import context
-from sqlalchemy import engine_from_config, pool
+from dotenv import load_dotenv
+from sqlalchemy import pool
 
+from danny_checksum.connectors.database.engine import database_url, make_engine
 from danny_checksum.connectors.database.models import Base
 
 config = context.config
@@ -13,15 +14,13 @@ if config.config_file_name is not None:
 
 target_metadata = Base.metadata
 
-# Build sqlite URL pointing to localdev.db in the project root
-PROJECT_ROOT = Path(__file__).resolve().parents[3]
-DB_PATH = PROJECT_ROOT / "localdev.db"
-SQLALCHEMY_URL = f"sqlite:///{DB_PATH}"
+# Pick up DATABASE_URL from .env, as the app's entry points do
+load_dotenv()
 
 
 def run_migrations_offline() -> None:
     context.configure(
-        url=SQLALCHEMY_URL,
+        url=database_url(),
         target_metadata=target_metadata,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
@@ -32,11 +31,8 @@ def run_migrations_offline() -> None:
 
 
 def run_migrations_online() -> None:
-    connectable = engine_from_config(
-        {"sqlalchemy.url": SQLALCHEMY_URL},
-        prefix="sqlalchemy.",
-        poolclass=pool.NullPool,
-    )
+    # Same URL and connection settings as the app
+    connectable = make_engine(poolclass=pool.NullPool)
 
     with connectable.connect() as connection:
         context.configure(connection=connection, target_metadata=target_metadata)
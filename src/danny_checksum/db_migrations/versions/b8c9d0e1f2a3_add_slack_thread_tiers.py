@@ -0,0 +1,30 @@
+"""add status and next_poll_at to slack_threads
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-17 16:20:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8c9d0e1f2a3'
+down_revision: Union[str, None] = 'a7b8c9d0e1f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('slack_threads') as batch_op:
+        batch_op.add_column(sa.Column('status', sa.String(), server_default='active', nullable=False))
+        batch_op.add_column(sa.Column('next_poll_at', sa.Float(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('slack_threads') as batch_op:
+        batch_op.drop_column('next_poll_at')
+        batch_op.drop_column('status')
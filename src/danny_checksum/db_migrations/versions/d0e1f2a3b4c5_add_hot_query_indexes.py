@@ -0,0 +1,42 @@
+"""add indexes for hot DAO lookups
+
+Revision ID: d0e1f2a3b4c5
+Revises: c9d0e1f2a3b4
+Create Date: 2026-10-17 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd0e1f2a3b4c5'
+down_revision: Union[str, None] = 'c9d0e1f2a3b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # set_last_sha used to select-then-insert, so concurrent pollers could
+    # leave duplicate names behind. Keep one row per name, preferring the
+    # newest one that has a processed SHA, before making name unique.
+    op.execute(sa.text(
+        "DELETE FROM customer_repos WHERE id NOT IN ("
+        " SELECT COALESCE("
+        "  MAX(CASE WHEN last_git_sha_successfully_processed IS NOT NULL THEN id END),"
+        "  MAX(id))"
+        " FROM customer_repos GROUP BY name)"
+    ))
+    op.create_index('ix_customer_repos_name', 'customer_repos', ['name'], unique=True)
+    op.create_index('ix_slack_threads_channel_id_status', 'slack_threads', ['channel_id', 'status'])
+    op.create_index('ix_deployments_component_created_at', 'deployments', ['component', 'created_at'])
+    op.create_index('ix_agent_jobs_group_key_status', 'agent_jobs', ['group_key', 'status'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_agent_jobs_group_key_status', table_name='agent_jobs')
+    op.drop_index('ix_deployments_component_created_at', table_name='deployments')
+    op.drop_index('ix_slack_threads_channel_id_status', table_name='slack_threads')
+    op.drop_index('ix_customer_repos_name', table_name='customer_repos')
@@ -0,0 +1,34 @@
+from pathlib import Path
+
+import pytest
+from alembic import command
+from alembic.config import Config
+
+from danny_checksum.connectors.database import engine as engine_module
+from danny_checksum.connectors.database.models import Base
+
+MIGRATIONS_DIR = Path(engine_module.__file__).resolve().parents[2] / "db_migrations"
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    """Point the DAOs at a fresh SQLite database built from the models."""
+    engine = engine_module.make_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(engine)
+    monkeypatch.setattr(engine_module, "engine", engine)
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def migrated_db(tmp_path, monkeypatch):
+    """Point the DAOs at a fresh SQLite database built by `alembic upgrade head`."""
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    monkeypatch.setenv("DATABASE_URL", url)
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_DIR))
+    command.upgrade(config, "head")
+    engine = engine_module.make_engine(url)
+    monkeypatch.setattr(engine_module, "engine", engine)
+    yield engine
+    engine.dispose()
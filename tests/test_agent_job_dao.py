@@ -0,0 +1,20 @@
+from sqlalchemy.dialects import postgresql, sqlite
+
+from danny_checksum.connectors.database import agent_job_dao
+
+
+def test_claim_skips_locked_rows_on_postgres():
+    statement = agent_job_dao._claim_statement("w1", 60, 1000.0)
+    assert "FOR UPDATE OF agent_jobs SKIP LOCKED" in str(statement.compile(dialect=postgresql.dialect()))
+    assert "FOR UPDATE" not in str(statement.compile(dialect=sqlite.dialect()))
+
+
+def test_claim_leases_each_job_once(db):
+    agent_job_dao.enqueue("new_message", "job-1", "thread-1", {})
+    agent_job_dao.enqueue("new_message", "job-2", "thread-2", {})
+
+    first = agent_job_dao.claim("w1", 60)
+    second = agent_job_dao.claim("w2", 60)
+
+    assert {first.idempotency_key, second.idempotency_key} == {"job-1", "job-2"}
+    assert agent_job_dao.claim("w3", 60) is None
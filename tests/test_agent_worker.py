@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+from pydantic_ai import Agent
+from pydantic_ai.messages import ModelResponse, TextPart, ToolReturnPart
+from pydantic_ai.models.function import AgentInfo, DeltaToolCall, FunctionModel
+
+from danny_checksum.business_logic.classical.backend.workers import agent_worker
+
+
+class FakeSlack:
+    def __init__(self):
+        self.updates = []
+        self.deleted = []
+
+    def post_message(self, channel_id, text, thread_ts=None):
+        return {"ts": "200.0"}
+
+    def update_message(self, channel_id, ts, text):
+        self.updates.append(text)
+
+    def delete_message(self, channel_id, ts):
+        self.deleted.append(ts)
+
+
+async def _preamble_then_tool(messages, info: AgentInfo):
+    if not any(isinstance(part, ToolReturnPart) for m in messages for part in m.parts):
+        yield "Let me look that up."
+        yield {0: DeltaToolCall(name="lookup", json_args="{}", tool_call_id="call-1")}
+    else:
+        yield "The answer "
+        yield "is 42."
+
+
+def _agent() -> Agent:
+    agent = Agent(FunctionModel(stream_function=_preamble_then_tool))
+
+    @agent.tool_plain
+    def lookup() -> str:
+        return "42"
+
+    return agent
+
+
+@pytest.fixture(autouse=True)
+def update_every_event(monkeypatch):
+    monkeypatch.setattr(agent_worker, "STREAM_UPDATE_SECONDS", 0.0)
+
+
+def test_stream_reply_runs_through_tool_calls():
+    slack = FakeSlack()
+    reply_ts, history = asyncio.run(
+        agent_worker._stream_reply(slack, _agent(), "C1", "100.0", "what is it?", None)
+    )
+
+    assert reply_ts == "200.0"
+    assert "Let me look that up." in slack.updates
+    assert slack.updates[-1] == "The answer is 42."
+    assert not slack.deleted
+
+    responses = [m for m in history if isinstance(m, ModelResponse)]
+    assert len(responses) == 2
+    assert any(isinstance(part, ToolReturnPart) for m in history for part in m.parts)
+    assert responses[-1].parts == [TextPart(content="The answer is 42.")]
+
+
+def test_stream_reply_deletes_placeholder_on_error():
+    async def broken(messages, info):
+        raise RuntimeError("model down")
+        yield  # pragma: no cover
+
+    slack = FakeSlack()
+    with pytest.raises(RuntimeError, match="model down"):
+        asyncio.run(
+            agent_worker._stream_reply(
+                slack, Agent(FunctionModel(stream_function=broken)), "C1", "100.0", "hi", None
+            )
+        )
+    assert slack.deleted == ["200.0"]
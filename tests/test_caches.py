@@ -0,0 +1,71 @@
+import asyncio
+
+from sqlalchemy import select
+
+from danny_checksum.connectors.database import git_blob_cache_dao, github_cache_dao
+from danny_checksum.connectors.database.models import GitBlobCache
+from danny_checksum.connectors.source_control import response_cache
+from danny_checksum.connectors.source_control.blob_cache import MISSING, BlobShaCache
+from danny_checksum.connectors.source_control.response_cache import CachedResponse, ResponseCache
+
+REPO = "acme/widgets"
+
+
+def _sha(n: int) -> str:
+    return f"{n:040x}"
+
+
+def test_blob_cache_persists_through_async_calls(db):
+    async def run():
+        await BlobShaCache(persistent=True).aput(REPO, _sha(1), ".checksum", "blob1")
+        return await BlobShaCache(persistent=True).aget(REPO, _sha(1), ".checksum")
+
+    assert asyncio.run(run()) == "blob1"
+    assert BlobShaCache(persistent=True).get(REPO, _sha(2), ".checksum") is MISSING
+
+
+def test_blob_cache_prunes_table(db, monkeypatch):
+    monkeypatch.setattr("danny_checksum.connectors.source_control.blob_cache.PRUNE_EVERY", 4)
+    cache = BlobShaCache(persistent=True, max_persisted=3)
+    for n in range(8):
+        cache.put(REPO, _sha(n), ".checksum", f"blob{n}")
+
+    with db.connect() as conn:
+        kept = conn.execute(select(GitBlobCache.commit_sha).order_by(GitBlobCache.id)).scalars().all()
+    assert kept == [_sha(5), _sha(6), _sha(7)]
+
+
+def test_response_cache_async_round_trip(db, monkeypatch):
+    monkeypatch.setattr(response_cache, "PRUNE_EVERY", 1)
+
+    async def run():
+        await ResponseCache(persistent=True).aput("k", CachedResponse('"etag"', None, {"a": 1}))
+        return await ResponseCache(persistent=True).aget("k")
+
+    entry = asyncio.run(run())
+    assert entry.etag == '"etag"'
+    assert entry.body == {"a": 1}
+
+
+def test_save_response_overwrites_existing_key(db):
+    github_cache_dao.save_response("k", '"v1"', None, "1")
+    github_cache_dao.save_response("k", '"v2"', "Mon", "2")
+    row = github_cache_dao.get_response("k")
+    assert (row.etag, row.last_modified, row.body_json) == ('"v2"', "Mon", "2")
+
+
+def test_save_entry_keeps_first_value(db):
+    git_blob_cache_dao.save_entry(REPO, _sha(1), ".checksum", "blob1")
+    git_blob_cache_dao.save_entry(REPO, _sha(1), ".checksum", "blob1")
+    assert git_blob_cache_dao.get_entry(REPO, _sha(1), ".checksum").blob_sha == "blob1"
+
+
+def test_blob_cache_is_bounded_and_remembers_missing_paths():
+    cache = BlobShaCache(max_entries=2)
+    cache.put(REPO, _sha(1), ".checksum", "blob1")
+    cache.put(REPO, _sha(2), ".checksum", None)
+    cache.put(REPO, _sha(3), ".checksum", "blob3")
+
+    assert cache.get(REPO, _sha(1), ".checksum") is MISSING
+    assert cache.get(REPO, _sha(2), ".checksum") is None
+    assert cache.get(REPO, _sha(3), ".checksum") == "blob3"
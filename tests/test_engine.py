@@ -0,0 +1,22 @@
+import subprocess
+import sys
+
+
+def test_importing_the_db_layer_does_not_load_dotenv():
+    code = (
+        "import sys\n"
+        "from danny_checksum.connectors.database import engine, repo_dao, slack_thread_dao\n"
+        "assert 'dotenv' not in sys.modules, 'the DB layer imported dotenv'\n"
+        "assert engine.engine is None, 'the engine was built at import'\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_engine_is_built_from_database_url_on_first_use(tmp_path, monkeypatch):
+    from danny_checksum.connectors.database import engine as engine_module
+
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'app.db'}")
+    monkeypatch.setattr(engine_module, "engine", None)
+    assert engine_module.get_engine().url.database == str(tmp_path / "app.db")
+    assert engine_module.get_engine() is engine_module.engine
+    engine_module.engine.dispose()
@@ -0,0 +1,111 @@
+import asyncio
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from danny_checksum.connectors.source_control.git_mirror import GitMirror
+
+REPO = "acme/widgets"
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-C", str(cwd), *args], check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def _commit(upstream: Path, path: str, content: str) -> str:
+    (upstream / path).write_text(content)
+    _git(upstream, "add", path)
+    _git(upstream, "-c", "user.name=t", "-c", "user.email=t@t", "commit", "-q", "-m", path)
+    return _git(upstream, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def upstream(tmp_path):
+    path = tmp_path / "upstream"
+    path.mkdir()
+    _git(path, "init", "-q", "-b", "main")
+    _git(path, "config", "uploadpack.allowFilter", "true")
+    return path
+
+
+@pytest.fixture
+def mirror(tmp_path, upstream):
+    mirror = GitMirror(token="unused", root=tmp_path / "mirrors")
+    # Create the mirror by hand so it fetches from the local upstream instead of GitHub
+    path = mirror.path_for(REPO)
+    path.mkdir(parents=True)
+    _git(path, "init", "-q", "--bare")
+    _git(path, "remote", "add", "origin", upstream.as_uri())
+    return mirror
+
+
+def test_get_branch_sha_fetches_first(upstream, mirror):
+    first = _commit(upstream, "README", "hi")
+    assert asyncio.run(mirror.get_branch_sha(REPO)) == first
+    second = _commit(upstream, "README", "hello")
+    assert asyncio.run(mirror.get_branch_sha(REPO)) == second
+
+
+def test_unfetched_push_sha_is_fetched(upstream, mirror):
+    base = _commit(upstream, "README", "hi")
+    asyncio.run(mirror.sync(REPO))
+    # A push the mirror hears about by webhook before its next fetch
+    pushed = _commit(upstream, ".checksum", "v1")
+
+    async def run():
+        return (
+            await mirror.get_file_blob_sha(REPO, ".checksum", pushed),
+            await mirror.commits_touching(REPO, base, pushed, ".checksum"),
+        )
+
+    blob_sha, touched = asyncio.run(run())
+    assert blob_sha == _git(upstream, "rev-parse", f"{pushed}:.checksum")
+    assert touched == [pushed]
+
+
+def test_unknown_commit_raises(upstream, mirror):
+    _commit(upstream, "README", "hi")
+    with pytest.raises(RuntimeError, match="not found"):
+        asyncio.run(mirror.get_file_blob_sha(REPO, ".checksum", "f" * 40))
+
+
+def test_missing_file_is_none(upstream, mirror):
+    sha = _commit(upstream, "README", "hi")
+    assert asyncio.run(mirror.get_file_blob_sha(REPO, ".checksum", sha)) is None
+
+
+def test_fetches_into_one_mirror_are_serialized(upstream, mirror):
+    base = _commit(upstream, "README", "hi")
+    asyncio.run(mirror.sync(REPO))
+    pushed = _commit(upstream, ".checksum", "v1")
+
+    running = 0
+    overlaps = []
+    git = mirror._git
+
+    async def tracking_git(repo, *args, **kwargs):
+        nonlocal running
+        if args[0] != "fetch":
+            return await git(repo, *args, **kwargs)
+        running += 1
+        overlaps.append(running)
+        try:
+            return await git(repo, *args, **kwargs)
+        finally:
+            running -= 1
+
+    mirror._git = tracking_git
+
+    async def run():
+        await asyncio.gather(
+            mirror.sync(REPO),
+            mirror.get_branch_sha(REPO),
+            mirror.commits_touching(REPO, base, pushed, ".checksum"),
+            mirror.get_file_blob_sha(REPO, ".checksum", pushed),
+        )
+
+    asyncio.run(run())
+    assert overlaps and max(overlaps) == 1
@@ -0,0 +1,105 @@
+import asyncio
+
+from danny_checksum.business_logic.classical.backend.pollers import git_poller
+from danny_checksum.business_logic.classical.backend.pollers.git_poller import (
+    poll_all_repos,
+    poll_main_branch,
+)
+from danny_checksum.connectors.database import checksum_change_dao, repo_dao
+from danny_checksum.connectors.source_control.github_api import BranchHead
+
+REPO = "acme/widgets"
+
+
+class FakeSource:
+    """A linear history c0..cN where the commits in `touching` changed .checksum."""
+
+    rate_limiting = (-1, -1)
+    rate_limiting_resettime = 0
+
+    def __init__(self, length: int, touching: set[int], head: int):
+        self.history = [f"c{i}" for i in range(length)]
+        self.touching = touching
+        self.head = head
+        self.ranges = []
+
+    async def get_branch_sha(self, repo: str, branch: str = "main") -> str:
+        return self.history[self.head]
+
+    async def get_branch_heads(
+        self, repos: list[str], branch: str = "main", path: str | None = None
+    ) -> dict[str, BranchHead]:
+        return {repo: BranchHead(sha=self.history[self.head], blob_sha=None) for repo in repos}
+
+    async def is_behind(self, repo: str, base_sha: str, head_sha: str) -> bool:
+        return self.history.index(head_sha) < self.history.index(base_sha)
+
+    async def commits_touching(self, repo: str, base_sha: str, head_sha: str, path: str) -> list[str]:
+        self.ranges.append((base_sha, head_sha))
+        # Let the other poll run in between, as a real API call would
+        await asyncio.sleep(0)
+        start, end = self.history.index(base_sha), self.history.index(head_sha)
+        return [self.history[i] for i in range(start + 1, end + 1) if i in self.touching]
+
+
+def test_first_poll_only_sets_baseline(db):
+    repo_dao.add_repo(REPO)
+    source = FakeSource(5, {1, 4}, head=3)
+    asyncio.run(poll_main_branch(source, REPO))
+    assert repo_dao.get_last_sha(REPO) == "c3"
+    # .checksum exists at c3, but nothing is known to have changed yet
+    assert checksum_change_dao.list_changes(REPO) == []
+
+    source.head = 4
+    asyncio.run(poll_main_branch(source, REPO))
+    assert [c.commit_sha for c in checksum_change_dao.list_changes(REPO)] == ["c4"]
+
+
+def test_concurrent_polls_process_each_range_once(db):
+    repo_dao.add_repo(REPO)
+    repo_dao.set_last_sha(REPO, "c0")
+    source = FakeSource(10, {2, 7}, head=9)
+
+    async def run():
+        # A webhook for c9 and a poll that read the older head c5 before it
+        await asyncio.gather(
+            poll_main_branch(source, REPO, "c9"),
+            poll_main_branch(source, REPO, "c5"),
+        )
+
+    asyncio.run(run())
+    assert repo_dao.get_last_sha(REPO) == "c9"
+    assert source.ranges == [("c0", "c9")]
+    assert [c.commit_sha for c in checksum_change_dao.list_changes(REPO)] == ["c2", "c7"]
+
+
+def test_advance_last_sha_is_compare_and_set(db):
+    repo_dao.add_repo(REPO)
+    assert repo_dao.advance_last_sha(REPO, None, "c1")
+    assert repo_dao.advance_last_sha(REPO, "c1", "c2")
+    # A poll that started from c1 finishing after the one that moved it to c2
+    assert not repo_dao.advance_last_sha(REPO, "c1", "c3")
+    assert repo_dao.get_last_sha(REPO) == "c2"
+
+
+def test_advance_last_sha_creates_untracked_repo_once(db):
+    assert repo_dao.advance_last_sha(REPO, None, "c1")
+    assert not repo_dao.advance_last_sha(REPO, None, "c2")
+    assert repo_dao.get_last_sha(REPO) == "c1"
+
+
+def test_record_change_is_idempotent(db):
+    checksum_change_dao.record_change(REPO, "c1")
+    checksum_change_dao.record_change(REPO, "c1")
+    assert len(checksum_change_dao.list_changes(REPO)) == 1
+
+
+def test_poll_all_repos_forgets_locks_of_untracked_repos(db, monkeypatch):
+    monkeypatch.setattr(git_poller, "_repo_locks", {"acme/removed": asyncio.Lock()})
+    repo_dao.add_repo(REPO)
+    repo_dao.set_last_sha(REPO, "c0")
+
+    asyncio.run(poll_all_repos(FakeSource(3, set(), head=2)))
+
+    assert set(git_poller._repo_locks) == {REPO}
+    assert repo_dao.get_last_sha(REPO) == "c2"
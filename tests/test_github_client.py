@@ -0,0 +1,419 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from danny_checksum.connectors.source_control.async_github_client import (
+    GITHUB_API_URL,
+    AsyncGitHubClient,
+)
+from danny_checksum.connectors.source_control.github_api import next_page_url
+from danny_checksum.connectors.source_control.github_client import GitHubClient
+from danny_checksum.connectors.source_control.response_cache import CachedResponse, ResponseCache
+
+REPO = "acme/widgets"
+
+
+def _items(start: int, count: int, prs: bool) -> list[dict]:
+    items = []
+    for number in range(start, start + count):
+        item = {"number": number, "state": "open", "title": f"item {number}"}
+        if prs:
+            item["pull_request"] = {"url": f"/pulls/{number}"}
+        items.append(item)
+    return items
+
+
+# Three pages: all PRs, then 10 issues among PRs, then 30 issues
+PAGES = [
+    _items(1, 100, prs=True),
+    _items(101, 90, prs=True) + _items(191, 10, prs=False),
+    _items(201, 30, prs=False),
+]
+
+
+def _link(page: int) -> str | None:
+    if page >= len(PAGES):
+        return None
+    return f'<{GITHUB_API_URL}/repositories/1/issues?state=open&per_page=100&page={page + 1}>; rel="next"'
+
+
+class FakeRequester:
+    def __init__(self):
+        self.urls = []
+
+    def requestJsonAndCheck(self, verb, url, parameters=None, headers=None):
+        self.urls.append(url)
+        page = int(url.rsplit("page=", 1)[1]) if "page=" in url else 1
+        link = _link(page)
+        return ({"link": link} if link else {}), PAGES[page - 1]
+
+
+class FakeGithub:
+    def __init__(self, requester=None):
+        self.requester = requester or FakeRequester()
+
+
+def test_next_page_url():
+    link = '<https://api.github.com/x?page=2>; rel="next", <https://api.github.com/x?page=5>; rel="last"'
+    assert next_page_url(link) == "https://api.github.com/x?page=2"
+    assert next_page_url('<https://api.github.com/x?page=1>; rel="prev"') is None
+    assert next_page_url(None) is None
+
+
+class RevalidatingRequester:
+    """Serves one branch, answering a matching If-None-Match with a 304 and no body."""
+
+    def __init__(self, etag: str | None = '"v1"'):
+        self.etag = etag
+        self.sent = []
+
+    def requestJsonAndCheck(self, verb, url, parameters=None, headers=None, input=None):
+        self.sent.append(dict(headers or {}))
+        response_headers = {"etag": self.etag} if self.etag else {}
+        if self.etag and (headers or {}).get("If-None-Match") == self.etag:
+            return response_headers, None
+        return response_headers, {"commit": {"sha": "abc"}}
+
+
+def test_repeat_reads_are_revalidated_and_served_from_cache():
+    requester = RevalidatingRequester()
+    client = GitHubClient(github=FakeGithub(requester))
+
+    assert client.get_branch_sha(REPO) == "abc"
+    assert client.get_branch_sha(REPO) == "abc"
+
+    assert requester.sent == [{}, {"If-None-Match": '"v1"'}]
+    assert client.cache_stats()["hits"] == 1
+    assert client.cache_stats()["misses"] == 1
+
+
+def test_responses_without_validators_are_not_cached():
+    requester = RevalidatingRequester(etag=None)
+    client = GitHubClient(github=FakeGithub(requester))
+
+    client.get_branch_sha(REPO)
+    client.get_branch_sha(REPO)
+
+    assert requester.sent == [{}, {}]
+    assert client.cache_stats()["entries"] == 0
+
+
+def test_cached_validators_survive_a_restart(db):
+    cache = ResponseCache(persistent=True)
+    GitHubClient(github=FakeGithub(RevalidatingRequester()), cache=cache).get_branch_sha(REPO)
+
+    requester = RevalidatingRequester()
+    second = GitHubClient(github=FakeGithub(requester), cache=ResponseCache(persistent=True))
+    assert second.get_branch_sha(REPO) == "abc"
+    assert requester.sent == [{"If-None-Match": '"v1"'}]
+
+
+def test_cache_keys_depend_on_auth_but_not_parameter_order():
+    key = ResponseCache.make_key
+    assert key("/x", {"a": 1}, "one") != key("/x", {"a": 1}, "two")
+    assert key("/x", {"a": 1, "b": 2}, "k") == key("/x", {"b": 2, "a": 1}, "k")
+
+
+def test_response_cache_is_bounded():
+    cache = ResponseCache(max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.put(key, CachedResponse('"e"', None, key))
+    assert cache.get("a") is None
+    assert cache.get("c").body == "c"
+
+
+class BlobRequester:
+    """Answers OBJECT_OID_QUERY lookups: .checksum exists at every ref, nothing else does."""
+
+    def __init__(self):
+        self.expressions = []
+
+    def graphql_query(self, query, variables):
+        self.expressions.append(variables["expression"])
+        ref, path = variables["expression"].split(":", 1)
+        obj = {"oid": f"blob-{ref[:7]}"} if path == ".checksum" else None
+        return {}, {"data": {"repository": {"object": obj}}}
+
+
+def test_blob_lookups_at_a_commit_are_cached():
+    requester = BlobRequester()
+    client = GitHubClient(github=FakeGithub(requester))
+    sha = "a" * 40
+
+    assert client.get_file_blob_sha(REPO, ".checksum", sha) == "blob-aaaaaaa"
+    assert client.get_file_blob_sha(REPO, ".checksum", sha) == "blob-aaaaaaa"
+    # A missing path is cached too
+    assert client.get_file_blob_sha(REPO, "missing", sha) is None
+    assert client.get_file_blob_sha(REPO, "missing", sha) is None
+
+    assert requester.expressions == [f"{sha}:.checksum", f"{sha}:missing"]
+    assert client.cache_stats()["blob_hits"] == 2
+
+
+def test_blob_lookups_at_a_branch_are_not_cached():
+    requester = BlobRequester()
+    client = GitHubClient(github=FakeGithub(requester))
+
+    client.get_file_blob_sha(REPO, ".checksum", "main")
+    client.get_file_blob_sha(REPO, ".checksum", "main")
+
+    assert requester.expressions == ["main:.checksum", "main:.checksum"]
+
+
+def _branch_heads_response(body: dict) -> dict:
+    """Answer a branch-heads query for repos named acme/r<n>.
+
+    r7 doesn't exist, r8 has no main branch, and only even-numbered repos have a .checksum.
+    """
+    variables = body["variables"]
+    data = {}
+    for alias in (k[1:] for k in variables if k.startswith("n")):
+        n = int(variables[f"n{alias}"][1:])
+        if n == 7:
+            data[f"r{alias}"] = None
+        elif n == 8:
+            data[f"r{alias}"] = {"ref": None}
+        else:
+            file = {"oid": f"blob{n}"} if n % 2 == 0 else None
+            data[f"r{alias}"] = {"ref": {"target": {"oid": f"{n:040x}", "file": file}}}
+    return {"data": data}
+
+
+class BranchHeadsRequester(BlobRequester):
+    graphql_url = "/graphql"
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def requestJsonAndCheck(self, verb, url, parameters=None, headers=None, input=None):
+        self.batches.append(len([k for k in input["variables"] if k.startswith("n")]))
+        return {}, _branch_heads_response(input)
+
+
+REPOS = [f"acme/r{n}" for n in range(150)]
+
+
+def test_branch_heads_are_batched_per_100_repos():
+    requester = BranchHeadsRequester()
+    client = GitHubClient(github=FakeGithub(requester))
+
+    heads = client.get_branch_heads(REPOS, "main", path=".checksum")
+
+    assert requester.batches == [100, 50]
+    assert set(REPOS) - set(heads) == {"acme/r7", "acme/r8"}
+    assert heads["acme/r149"].sha == f"{149:040x}"
+    assert heads["acme/r2"].blob_sha == "blob2"
+    assert heads["acme/r3"].blob_sha is None
+
+
+def test_branch_heads_seed_the_blob_cache():
+    requester = BranchHeadsRequester()
+    client = GitHubClient(github=FakeGithub(requester))
+
+    heads = client.get_branch_heads(REPOS[:4], "main", path=".checksum")
+
+    for repo, head in heads.items():
+        assert client.get_file_blob_sha(repo, ".checksum", head.sha) == head.blob_sha
+    assert requester.expressions == []
+
+
+def test_list_issues_pages_past_pull_requests():
+    client = GitHubClient(github=FakeGithub())
+    lines = client.list_issues(REPO).splitlines()
+    assert len(lines) == 25
+    assert lines[0].startswith("#191 ")
+    assert lines[-1].startswith("#215 ")
+    assert len(client.github.requester.urls) == 3
+
+
+def test_list_issues_stops_on_last_page():
+    client = GitHubClient(github=FakeGithub())
+    client.github.requester.requestJsonAndCheck = lambda *args, **kwargs: ({}, PAGES[0])
+    assert client.list_issues(REPO) == "No issues found."
+
+
+def test_async_list_issues_pages_past_pull_requests():
+    requested = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        page = int(request.url.params.get("page", 1))
+        link = _link(page)
+        return httpx.Response(200, json=PAGES[page - 1], headers={"link": link} if link else {})
+
+    async def run() -> str:
+        http = httpx.AsyncClient(base_url=GITHUB_API_URL, transport=httpx.MockTransport(handler))
+        client = AsyncGitHubClient(http=http)
+        try:
+            return await client.list_issues(REPO)
+        finally:
+            await client.aclose()
+
+    lines = asyncio.run(run()).splitlines()
+    assert len(lines) == 25
+    assert lines[0].startswith("#191 ")
+    assert len(requested) == 3
+
+
+def _async_client(handler) -> AsyncGitHubClient:
+    return AsyncGitHubClient(
+        http=httpx.AsyncClient(base_url=GITHUB_API_URL, transport=httpx.MockTransport(handler))
+    )
+
+
+def _run(client: AsyncGitHubClient, coro_fn):
+    async def run():
+        try:
+            return await coro_fn(client)
+        finally:
+            await client.aclose()
+
+    return asyncio.run(run())
+
+
+def test_async_repeat_reads_are_revalidated_and_track_the_rate_limit():
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        sent.append(request.headers.get("if-none-match"))
+        headers = {
+            "etag": '"v1"',
+            "x-ratelimit-remaining": str(4999 - len(sent)),
+            "x-ratelimit-limit": "5000",
+            "x-ratelimit-reset": "1700000000",
+        }
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304, headers=headers)
+        return httpx.Response(200, json={"commit": {"sha": "abc"}}, headers=headers)
+
+    client = _async_client(handler)
+
+    async def twice(c):
+        return [await c.get_branch_sha(REPO), await c.get_branch_sha(REPO)]
+
+    assert _run(client, twice) == ["abc", "abc"]
+    assert sent == [None, '"v1"']
+    assert client.cache_stats()["hits"] == 1
+    assert client.rate_limiting == (4997, 5000)
+    assert client.rate_limiting_resettime == 1700000000
+
+
+def test_async_branch_heads_are_batched_and_seed_the_blob_cache():
+    batches = []
+    lookups = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        if "expression" in body["variables"]:
+            lookups.append(body["variables"]["expression"])
+            return httpx.Response(200, json={"data": {"repository": {"object": None}}})
+        batches.append(len([k for k in body["variables"] if k.startswith("n")]))
+        return httpx.Response(200, json=_branch_heads_response(body))
+
+    client = _async_client(handler)
+
+    async def run(c):
+        heads = await c.get_branch_heads(REPOS, "main", path=".checksum")
+        blobs = [await c.get_file_blob_sha(r, ".checksum", h.sha) for r, h in heads.items()]
+        return heads, blobs
+
+    heads, blobs = _run(client, run)
+    assert sorted(batches) == [50, 100]
+    assert set(REPOS) - set(heads) == {"acme/r7", "acme/r8"}
+    assert blobs == [head.blob_sha for head in heads.values()]
+    assert lookups == []
+
+
+def test_async_blob_lookup_in_a_missing_repo_raises():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json={"data": {"repository": None}})
+
+    with pytest.raises(ValueError, match="not found"):
+        _run(_async_client(handler), lambda c: c.get_file_blob_sha(REPO, ".checksum", "a" * 40))
+
+
+def test_async_errors_are_raised():
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(404, json={"message": "Not Found"})
+
+    with pytest.raises(httpx.HTTPStatusError):
+        _run(_async_client(handler), lambda c: c.get_branch_sha(REPO))
+
+
+# A linear main branch c0..c399, committed a minute apart, touching .checksum on every other commit
+HISTORY = [f"{i:040x}" for i in range(400)]
+TOUCHING = set(range(0, 400, 2))
+
+
+def _commit_json(i: int) -> dict:
+    return {
+        "sha": HISTORY[i],
+        "commit": {"committer": {"date": f"2026-01-01T{i // 60:02d}:{i % 60:02d}:00Z"}},
+    }
+
+
+def _paged(request: httpx.Request, items: list) -> tuple[list, dict]:
+    per_page = int(request.url.params.get("per_page", 30))
+    page = int(request.url.params.get("page", 1))
+    chunk = items[(page - 1) * per_page:page * per_page]
+    headers = {}
+    if page * per_page < len(items):
+        next_url = request.url.copy_set_param("page", str(page + 1))
+        headers["link"] = f'<{next_url}>; rel="next"'
+    return chunk, headers
+
+
+def _fake_github(requested: list[str], compare_total_extra: int = 0):
+    def handler(request: httpx.Request) -> httpx.Response:
+        requested.append(str(request.url))
+        path = request.url.path
+        if "/compare/" in path:
+            base, head = path.rsplit("/", 1)[1].split("...")
+            start, end = HISTORY.index(base), HISTORY.index(head)
+            commits = [_commit_json(i) for i in range(start + 1, end + 1)]
+            chunk, headers = _paged(request, commits)
+            body = {"total_commits": len(commits) + compare_total_extra, "commits": chunk}
+            return httpx.Response(200, json=body, headers=headers)
+        if path.endswith("/commits"):
+            head = HISTORY.index(request.url.params["sha"])
+            commits = [_commit_json(i) for i in range(head, -1, -1) if i in TOUCHING]
+            chunk, headers = _paged(request, commits)
+            return httpx.Response(200, json=chunk, headers=headers)
+        return httpx.Response(404)
+
+    return AsyncGitHubClient(
+        http=httpx.AsyncClient(base_url=GITHUB_API_URL, transport=httpx.MockTransport(handler))
+    )
+
+
+def test_commits_touching_pages_through_long_ranges():
+    requested = []
+
+    async def run():
+        client = _fake_github(requested)
+        try:
+            return await client.commits_touching(REPO, HISTORY[150], HISTORY[399], ".checksum")
+        finally:
+            await client.aclose()
+
+    touched = asyncio.run(run())
+    # 249 commits in range, well past one page of compare or of the path's history
+    assert touched == [HISTORY[i] for i in range(152, 400, 2)]
+    commit_pages = [url for url in requested if url.split("?")[0].endswith("/commits")]
+    # The second page reaches commits older than the range; the third isn't read
+    assert len(commit_pages) == 2
+
+
+def test_commits_touching_refuses_incomplete_compare():
+    async def run():
+        client = _fake_github([], compare_total_extra=1)
+        try:
+            await client.commits_touching(REPO, HISTORY[0], HISTORY[399], ".checksum")
+        finally:
+            await client.aclose()
+
+    with pytest.raises(RuntimeError, match="listed 399 of 400"):
+        asyncio.run(run())
@@ -0,0 +1,26 @@
+from sqlalchemy import inspect
+
+from danny_checksum.connectors.database.models import Base
+
+
+def _indexes(engine) -> dict[str, set[tuple[str, tuple[str, ...], bool]]]:
+    inspector = inspect(engine)
+    return {
+        table: {
+            (index["name"], tuple(index["column_names"]), bool(index["unique"]))
+            for index in inspector.get_indexes(table)
+        }
+        for table in Base.metadata.tables
+    }
+
+
+def test_migrations_create_the_models_indexes(db, migrated_db):
+    assert _indexes(migrated_db) == _indexes(db)
+
+
+def test_migrations_create_the_models_tables(db, migrated_db):
+    migrated, built = inspect(migrated_db), inspect(db)
+    for table in Base.metadata.tables:
+        assert {c["name"] for c in migrated.get_columns(table)} == {
+            c["name"] for c in built.get_columns(table)
+        }, table
@@ -0,0 +1,112 @@
+"""The hot DAO lookups must use an index rather than scan their table.
+
+Each lookup runs against a SQLite database built by the Alembic migrations,
+so the indexes checked are the ones production gets; the SQL it sends is
+captured and run through EXPLAIN QUERY PLAN.
+"""
+import re
+import time
+
+import pytest
+from sqlalchemy import event, select
+
+from danny_checksum.connectors.database import (
+    agent_job_dao,
+    checksum_change_dao,
+    git_blob_cache_dao,
+    github_cache_dao,
+    repo_dao,
+    slack_dao,
+    slack_thread_dao,
+)
+from danny_checksum.connectors.database import engine as engine_module
+from danny_checksum.connectors.database.models import Deployment
+
+CHANNEL_ID = "CPLAN"
+REPO = "acme/widgets"
+THREAD_TS = "1700000000.000100"
+SHA = "a" * 40
+
+# A bare "SCAN t" reads the whole table; "SCAN t USING [COVERING] INDEX ..." doesn't
+FULL_SCAN = re.compile(r"^SCAN (\w+)$")
+
+
+def _latest_deployment(component: str) -> Deployment | None:
+    # Deployments are only written today; this is the lookup the index is for
+    with engine_module.get_session() as session:
+        return session.scalars(
+            select(Deployment)
+            .where(Deployment.component == component)
+            .order_by(Deployment.created_at.desc())
+            .limit(1)
+        ).first()
+
+
+LOOKUPS = {
+    "repo_dao.get_last_sha": lambda: repo_dao.get_last_sha(REPO),
+    "repo_dao.set_last_sha": lambda: repo_dao.set_last_sha(REPO, SHA),
+    "repo_dao.advance_last_sha": lambda: repo_dao.advance_last_sha(REPO, None, SHA),
+    "repo_dao.add_repo": lambda: repo_dao.add_repo(REPO),
+    "repo_dao.get_repo": lambda: repo_dao.get_repo(REPO),
+    "checksum_change_dao.record_change": lambda: checksum_change_dao.record_change(REPO, SHA),
+    "git_blob_cache_dao.get_entry": lambda: git_blob_cache_dao.get_entry(REPO, SHA, ".checksum"),
+    "git_blob_cache_dao.save_entry": lambda: git_blob_cache_dao.save_entry(REPO, SHA, ".checksum", "b"),
+    "github_cache_dao.get_response": lambda: github_cache_dao.get_response("key"),
+    "github_cache_dao.save_response": lambda: github_cache_dao.save_response("key", '"e"', None, "{}"),
+    "slack_dao.get_last_thread_ts": lambda: slack_dao.get_last_thread_ts(CHANNEL_ID),
+    "slack_thread_dao.get_thread_by_ts": lambda: slack_thread_dao.get_thread_by_ts(THREAD_TS),
+    "slack_thread_dao.get_active_thread_cursors": lambda: slack_thread_dao.get_active_thread_cursors(
+        CHANNEL_ID, time.time()
+    ),
+    "slack_thread_dao.get_archived_thread_cursors": lambda: slack_thread_dao.get_archived_thread_cursors(
+        CHANNEL_ID
+    ),
+    "slack_thread_dao.get_history_rows": lambda: slack_thread_dao.get_history_rows(THREAD_TS),
+    "agent_job_dao.supersede_pending": lambda: agent_job_dao.supersede_pending(
+        "thread_replies", THREAD_TS, "keep"
+    ),
+    "agent_job_dao.claim": lambda: agent_job_dao.claim("plan-check", 60),
+    "latest deployment": lambda: _latest_deployment("api"),
+}
+
+
+@pytest.fixture
+def seeded(migrated_db):
+    repo_dao.add_repo(REPO)
+    slack_dao.set_last_thread_ts(CHANNEL_ID, THREAD_TS)
+    slack_thread_dao.create_thread(CHANNEL_ID, THREAD_TS, session_id=1)
+    agent_job_dao.enqueue("thread_replies", "job-1", THREAD_TS, {})
+    return migrated_db
+
+
+def _captured_statements(engine, fn) -> list[tuple[str, tuple]]:
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE", "INSERT")):
+            statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", capture)
+    try:
+        fn()
+    finally:
+        event.remove(engine, "before_cursor_execute", capture)
+    return statements
+
+
+def _plan(engine, statement: str, parameters: tuple) -> list[str]:
+    with engine.connect() as conn:
+        cursor = conn.connection.cursor()
+        rows = cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+        cursor.close()
+    return [row[-1] for row in rows]
+
+
+@pytest.mark.parametrize("name", LOOKUPS)
+def test_lookup_uses_an_index(seeded, name):
+    statements = _captured_statements(seeded, LOOKUPS[name])
+    assert statements
+    for statement, parameters in statements:
+        plan = _plan(seeded, statement, parameters)
+        scans = [m.group(1) for line in plan if (m := FULL_SCAN.match(line))]
+        assert not scans, f"{name} scans {scans}:\n{statement}\n" + "\n".join(plan)
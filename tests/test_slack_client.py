@@ -0,0 +1,23 @@
+from slack_sdk.http_retry.builtin_handlers import RateLimitErrorRetryHandler
+
+from danny_checksum.connectors.chat_programs.rate_limiter import retry_after_seconds
+from danny_checksum.connectors.chat_programs.slack_client import SlackClient
+
+
+def _retries_rate_limits(client: SlackClient) -> bool:
+    return any(isinstance(h, RateLimitErrorRetryHandler) for h in client.client.retry_handlers)
+
+
+def test_rate_limits_are_retried_by_default():
+    assert _retries_rate_limits(SlackClient.from_token("xoxb-test"))
+
+
+def test_rate_limits_can_be_left_to_the_caller():
+    assert not _retries_rate_limits(SlackClient.from_token("xoxb-test", retry_rate_limits=False))
+
+
+def test_retry_after_seconds():
+    assert retry_after_seconds({"retry-after": "7"}) == 7.0
+    assert retry_after_seconds({"Retry-After": "3"}) == 3.0
+    assert retry_after_seconds({"retry-after": "soon"}, default=5.0) == 5.0
+    assert retry_after_seconds({}, default=5.0) == 5.0
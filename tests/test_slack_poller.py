@@ -0,0 +1,134 @@
+import time
+
+import pytest
+from slack_sdk.errors import SlackApiError
+from slack_sdk.web import SlackResponse
+from sqlalchemy import select, update
+
+from danny_checksum.business_logic.classical.backend.pollers import slack_poller
+from danny_checksum.business_logic.classical.backend.pollers.scheduler import PollScheduler
+from danny_checksum.connectors.database import customer_channel_dao, slack_dao, slack_thread_dao
+from danny_checksum.connectors.database.models import AgentJob, SlackThread
+
+CHANNEL_ID = "C1"
+BOT = "UBOT"
+OLD = "1600000000.000100"  # long enough ago to be archived
+QUIET = "1600000100.000100"
+
+
+class FakeSlack:
+    """A channel whose history holds only its threads' parent messages."""
+
+    def __init__(self, latest_replies: dict[str, str | None], replies: dict[str, list[dict]]):
+        self.latest_replies = latest_replies  # parent ts -> latest_reply
+        self.replies = replies
+        self.archive_reads = 0
+
+    def ensure_joined(self, channel_id):
+        pass
+
+    def read_history_page(
+        self, channel_id, oldest=None, cursor=None, limit=200, latest=None, inclusive=False
+    ):
+        if latest is None:
+            return [], None  # nothing new at the top level
+        self.archive_reads += 1
+        messages = [
+            {"ts": ts, "user": "U1", "text": "hi", **({"latest_reply": lr} if lr else {})}
+            for ts, lr in self.latest_replies.items()
+            if oldest <= ts <= latest
+        ]
+        return sorted(messages, key=lambda m: m["ts"], reverse=True), None
+
+    def read_thread_replies(self, channel_id, thread_ts, oldest=None):
+        return [r for r in self.replies.get(thread_ts, []) if oldest is None or r["ts"] >= oldest]
+
+
+@pytest.fixture(autouse=True)
+def setup(db, monkeypatch):
+    monkeypatch.setenv("SLACK_COALESCE_REPLIES", "0")
+    monkeypatch.setattr(slack_poller, "_archive_checked_at", {})
+    slack_dao.set_last_thread_ts(CHANNEL_ID, QUIET)
+    for ts in (OLD, QUIET):
+        slack_thread_dao.create_thread(CHANNEL_ID, ts, session_id=1)
+        slack_thread_dao.archive_thread(ts)
+    with db.begin() as conn:
+        conn.execute(update(SlackThread).values(last_reply_ts=SlackThread.thread_ts))
+
+
+def _status(db, thread_ts: str) -> str:
+    with db.connect() as conn:
+        return conn.execute(
+            select(SlackThread.status).where(SlackThread.thread_ts == thread_ts)
+        ).scalar_one()
+
+
+def _jobs(db) -> list[str]:
+    with db.connect() as conn:
+        return list(conn.execute(select(AgentJob.idempotency_key)).scalars())
+
+
+def test_polling_revives_archived_thread_with_new_reply(db):
+    reply = {"ts": "1700000000.000200", "user": "U1", "text": "still there?"}
+    slack = FakeSlack({OLD: reply["ts"], QUIET: QUIET}, {OLD: [reply]})
+
+    assert slack_poller.poll_slack_channel(slack, CHANNEL_ID, BOT)
+
+    assert _status(db, OLD) == "active"
+    assert _status(db, QUIET) == "archived"
+    assert _jobs(db) == [f"thread_replies:{OLD}:{reply['ts']}"]
+
+
+def test_archived_threads_are_checked_once_per_interval(db):
+    slack = FakeSlack({OLD: OLD, QUIET: QUIET}, {})
+
+    assert not slack_poller.poll_slack_channel(slack, CHANNEL_ID, BOT)
+    assert not slack_poller.poll_slack_channel(slack, CHANNEL_ID, BOT)
+
+    assert slack.archive_reads == 1
+    assert _jobs(db) == []
+
+
+def test_no_connection_is_held_during_slack_calls(db):
+    checked_out = []
+
+    class WatchedSlack(FakeSlack):
+        def read_history_page(self, *args, **kwargs):
+            checked_out.append(db.pool.checkedout())
+            return super().read_history_page(*args, **kwargs)
+
+        def read_thread_replies(self, *args, **kwargs):
+            checked_out.append(db.pool.checkedout())
+            return super().read_thread_replies(*args, **kwargs)
+
+    reply = {"ts": "1700000000.000200", "user": "U1", "text": "still there?"}
+    slack = WatchedSlack({OLD: reply["ts"], QUIET: QUIET}, {OLD: [reply]})
+
+    assert slack_poller.poll_slack_channel(slack, CHANNEL_ID, BOT)
+
+    assert checked_out and set(checked_out) == {0}
+    assert _jobs(db) == [f"thread_replies:{OLD}:{reply['ts']}"]
+
+
+class RateLimitedSlack:
+    def ensure_joined(self, channel_id):
+        response = SlackResponse(
+            client=None,
+            http_verb="POST",
+            api_url="https://slack.com/api/users.conversations",
+            req_args={},
+            data={"ok": False, "error": "ratelimited"},
+            headers={"retry-after": "7"},
+            status_code=429,
+        )
+        raise SlackApiError("ratelimited", response)
+
+
+def test_rate_limit_pauses_for_lowercase_retry_after(db):
+    customer_channel_dao.add_channel(CHANNEL_ID, "general")
+    scheduler = PollScheduler()
+
+    slack_poller.poll_all_slack_channels(RateLimitedSlack(), BOT, scheduler)
+
+    assert scheduler._paused_until == pytest.approx(time.time() + 7, abs=1)
+    assert scheduler.due([CHANNEL_ID]) == []
@@ -0,0 +1,59 @@
+import hashlib
+import hmac
+
+import pytest
+from fastapi.testclient import TestClient
+from slack_sdk.signature import SignatureVerifier
+
+from danny_checksum.business_logic.classical.backend import web_server
+from danny_checksum.connectors.database import checksum_change_dao
+
+
+@pytest.fixture
+def http():
+    # Without the context manager the lifespan doesn't run, so nothing connects out
+    return TestClient(web_server.app)
+
+
+def test_slack_events_disabled_without_signing_secret(http, monkeypatch):
+    monkeypatch.setattr(web_server, "slack_signature_verifier", None)
+    response = http.post("/webhooks/slack", content=b'{"type": "url_verification"}')
+    assert response.status_code == 404
+
+
+def test_slack_events_reject_bad_signature(http, monkeypatch):
+    monkeypatch.setattr(web_server, "slack_signature_verifier", SignatureVerifier("secret"))
+    response = http.post("/webhooks/slack", content=b'{"type": "url_verification"}')
+    assert response.status_code == 401
+
+
+def _push(secret: bytes | None = None) -> dict:
+    body = b'{"ref": "refs/heads/dev", "after": "abc", "repository": {"full_name": "acme/widgets"}}'
+    headers = {"X-GitHub-Event": "push"}
+    if secret is not None:
+        headers["X-Hub-Signature-256"] = "sha256=" + hmac.new(secret, body, hashlib.sha256).hexdigest()
+    return {"content": body, "headers": headers}
+
+
+def test_github_webhook_disabled_without_secret(http, monkeypatch):
+    monkeypatch.setattr(web_server, "github_webhook_secret", None)
+    assert http.post("/webhooks/github", **_push()).status_code == 404
+
+
+def test_github_webhook_checks_signature(http, monkeypatch):
+    monkeypatch.setattr(web_server, "github_webhook_secret", b"secret")
+    assert http.post("/webhooks/github", **_push(b"wrong")).status_code == 401
+    response = http.post("/webhooks/github", **_push(b"secret"))
+    assert response.status_code == 200
+    assert response.json() == {"result": "ignored"}
+
+
+def test_list_checksum_changes(http, db):
+    checksum_change_dao.record_change("acme/widgets", "c2")
+    checksum_change_dao.record_change("acme/widgets", "c7")
+    checksum_change_dao.record_change("acme/other", "c1")
+
+    response = http.get("/checksum/changes", params={"repo": "acme/widgets"})
+
+    assert response.status_code == 200
+    assert [c["commit_sha"] for c in response.json()["result"]] == ["c2", "c7"]